@@ -2,18 +2,21 @@ import re
 import io
 import streamlit as st
 import pandas as pd
+import numpy as np
 import pydeck as pdk
 import altair as alt
 import requests
-import subprocess
-import time
 import os
+import hashlib
+import math
 from datetime import datetime
-
-@st.cache_data
-def load_data():
-    """Charge le CSV nettoyé (avec cache Streamlit)"""
-    return pd.read_csv("data/cleaned_data.csv")
+from functools import partial
+from data_access import (load_backend, load_city_scores, load_price_trends, data_memory_report,
+                         last_update, last_metrics)
+from map_bins import MAP_POINT_THRESHOLD, fit_zoom
+from exports import FORMATS, export_file
+from result_cache import results
+from refresh_job import job as refresh_job
 
 st.set_page_config(page_title="Tableau de bord Streamlit", layout="wide")
 st.title("📊 Tableau de bord des annonces immobilières")
@@ -21,46 +24,95 @@ st.title("📊 Tableau de bord des annonces immobilières")
 # --- Bouton de mise à jour ---
 st.sidebar.markdown("### ⚙️ Actualisation des données")
 
-if st.sidebar.button("🔄 Actualiser les données"):
-    with st.spinner("Scraping et nettoyage en cours... ⏳"):
-        try:
-            subprocess.run(["python", "scripts/scraper_annonces.py"], check=True)
-            subprocess.run(["python", "scripts/scraper_ville_ideale.py"], check=True)  # ← اضافه شد
-            subprocess.run(["python", "scripts/cleaner.py"], check=True)
-            st.success("✅ Données mises à jour avec succès !")
-        except Exception as e:
-            st.error(f"❌ Erreur lors de la mise à jour : {e}")
-        time.sleep(1)
-        st.cache_data.clear()
-
-# --- Chargement des données ---
-df = load_data()
-
-# st.header("🏙️ Notes de qualité de vie (Ville Idéale)")
-
-# try:
-#     df_villes = pd.read_csv("data/villes_scores.csv")
-#     st.dataframe(df_villes, use_container_width=True)
-# except FileNotFoundError:
-#     st.warning("⚠️ Les données Ville Idéale ne sont pas encore disponibles. Cliquez sur Actualiser pour les générer.")
+# Le scraping tourne en arrière-plan : la session reste utilisable et toutes les sessions voient l'avancement
+if st.sidebar.button("🔄 Actualiser les données", disabled=refresh_job.running):
+    if not refresh_job.start():
+        st.sidebar.warning("⏳ Une actualisation est déjà en cours.")
+
+STAGE_ICONS = {"pending": "⏸️", "running": "⏳", "done": "✅", "skipped": "⏭️", "error": "❌"}
+
+@st.fragment(run_every=2 if refresh_job.running else 10)
+def refresh_status():
+    status = refresh_job.snapshot()
+    # Les données viennent d'être remplacées : on relance toute la page une fois
+    st.session_state.setdefault("refresh_seen", status["finished_at"])
+    if status["finished_at"] != st.session_state["refresh_seen"]:
+        st.session_state["refresh_seen"] = status["finished_at"]
+        st.rerun(scope="app")
+
+    if status["state"] == "running":
+        done = sum(stage["status"] in ("done", "skipped") for stage in status["stages"])
+        st.progress(done / len(status["stages"]), text="Scraping et nettoyage en cours... ⏳")
+        for stage in status["stages"]:
+            st.caption(f"{STAGE_ICONS[stage['status']]} {stage['name']} {stage['last_line'][:80]}")
+        if st.button("⏹️ Annuler l'actualisation"):
+            refresh_job.cancel()
+    elif status["state"] == "done":
+        st.success(status["message"])
+    elif status["state"] in ("error", "cancelled"):
+        st.error(status["message"])
+
+with st.sidebar:
+    refresh_status()
+
+# --- Moteur de requête (partagé entre sessions, reconstruit seulement si le fichier de données change) ---
+# pandas : annonces en mémoire au format compact ; duckdb : requêtes sur le fichier (IMMO_QUERY_BACKEND)
+backend = load_backend()
 
 
 try:
-    ts = os.path.getmtime("data/cleaned_data.csv")
-    date_update = datetime.fromtimestamp(ts).strftime("%d/%m/%Y à %H:%M")
+    date_update = last_update().strftime("%d/%m/%Y à %H:%M")
     st.sidebar.info(f"🕒 Dernière mise à jour : {date_update}")
 except:
     st.sidebar.warning("⚠️ Aucune donnée disponible pour le moment.")
 
+# --- Diagnostics du dernier rafraîchissement ---
+run_metrics = last_metrics()
+if run_metrics is not None:
+    with st.sidebar.expander("🩺 Diagnostics du dernier rafraîchissement"):
+        run_status = {"done": "✅ terminé", "error": "❌ en erreur", "cancelled": "⏹️ annulé"}
+        st.caption(f"{run_status.get(run_metrics['status'], run_metrics['status'])} — "
+                   f"{datetime.fromtimestamp(run_metrics['finished_at']):%d/%m/%Y à %H:%M}, "
+                   f"{run_metrics['finished_at'] - run_metrics['started_at']:.1f}s au total")
+
+        if run_metrics["stages"]:
+            st.markdown("**Étapes**")
+            st.dataframe(pd.DataFrame([
+                {"Étape": name, "Statut": stage["status"], "Durée (s)": stage["seconds"]}
+                for name, stage in run_metrics["stages"].items()
+            ]), hide_index=True, use_container_width=True)
+
+        if run_metrics["timings"]:
+            st.markdown("**Temps par opération**")
+            st.dataframe(pd.DataFrame([
+                {"Opération": name, "Appels": t["count"], "Durée (s)": t["seconds"]}
+                for name, t in run_metrics["timings"].items()
+            ]), hide_index=True, use_container_width=True)
+
+        if run_metrics["http"]:
+            st.markdown("**Requêtes HTTP par hôte**")
+            buckets = [f"≤{b} ms" for b in run_metrics["latency_buckets_ms"]]
+            buckets.append(f">{run_metrics['latency_buckets_ms'][-1]} ms")
+            st.dataframe(pd.DataFrame([
+                {"Hôte": host, "Requêtes": h["requests"], "Erreurs": h["errors"], "Reprises": h["retries"],
+                 "Moyenne (ms)": round(h["latency_sum_ms"] / h["requests"], 1) if h["requests"] else None,
+                 "Max (ms)": h["latency_max_ms"], **dict(zip(buckets, h["histogram"]))}
+                for host, h in run_metrics["http"].items()
+            ]), hide_index=True, use_container_width=True)
+
+        if run_metrics["cache"]:
+            st.markdown("**Cache**")
+            st.dataframe(pd.DataFrame([
+                {"Source": source, "Hits": c["hits"], "Misses": c["misses"], "Taux de hit": f"{c['hit_rate']:.0%}"}
+                for source, c in run_metrics["cache"].items()
+            ]), hide_index=True, use_container_width=True)
 
 
-# 1. Charger les données
-df = pd.read_csv("data/cleaned_data.csv")
 
 # ---- Aperçu des données (head) ----
 st.write("Aperçu des données :")
 st.data_editor(
-    df.head(),
+    backend.page((), 0, 5),
     use_container_width=True,
     column_config={
         "latitude": None,
@@ -77,16 +129,19 @@ st.data_editor(
 )
 
 # 2. Filtres interactifs
+# Chaque filtre ajoute une condition ; options et bornes des widgets suivants sont calculées par le moteur
+# de requête sur les conditions précédentes, et seul le résultat final est matérialisé
 st.sidebar.header("🔍 Filtres")
+filters = ()
 
-def safe_slider(label, series, unit=""):
+def safe_slider(label, bounds, unit=""):
     """Crée un slider Streamlit si plusieurs valeurs existent, sinon affiche la valeur unique."""
-    if series.dropna().empty:
+    if bounds is None:
         st.sidebar.write(f"Aucune donnée pour {label}")
         return (None, None)
 
-    min_val = int(series.min())
-    max_val = int(series.max())
+    min_val = int(bounds[0])
+    max_val = int(bounds[1])
 
     if min_val == max_val:
         # st.sidebar.write(f"{label} unique : {min_val}{unit}")
@@ -96,8 +151,8 @@ def safe_slider(label, series, unit=""):
 
 
 # --- Ville ---
-if "city" in df.columns:
-    villes = sorted(df["city"].dropna().unique())
+if backend.has("city"):
+    villes = backend.options("city", filters)
 
     paris_arr = [v for v in villes if v.startswith("Paris")]
     autres_villes = [v for v in villes if not v.startswith("Paris")]
@@ -111,81 +166,119 @@ if "city" in df.columns:
         arr_opt = ["Tous arrondissements"] + paris_arr
         arr_selection = st.sidebar.selectbox("Arrondissement", options=arr_opt)
         if arr_selection != "Tous arrondissements":
-            df = df[df["city"] == arr_selection]
+            filters += (("city", "in", (arr_selection,)),)
         else:
-            df = df[df["city"].isin(paris_arr)]
+            filters += (("city", "in", tuple(paris_arr)),)
     else:
-        df = df[df["city"] == ville_selectionnee]
+        filters += (("city", "in", (ville_selectionnee,)),)
 else:
     ville_selectionnee = None
 
 # --- Filtre Prix ---
-if "price" in df.columns:
-    prix_range = safe_slider("Prix 💶", df["price"], " €")
+if backend.has("price"):
+    prix_range = safe_slider("Prix 💶", backend.bounds("price", filters), " €")
     if prix_range[0] is not None:
-        df = df[(df["price"] >= prix_range[0]) & (df["price"] <= prix_range[1])]
+        filters += (("price", "between", tuple(prix_range)),)
 
 # --- Filtre Surface ---
-if "surface" in df.columns:
-    surface_range = safe_slider("Surface 📐(m²)", df["surface"], " m²")
+if backend.has("surface"):
+    surface_range = safe_slider("Surface 📐(m²)", backend.bounds("surface", filters), " m²")
     if surface_range[0] is not None:
-        df = df[(df["surface"] >= surface_range[0]) & (df["surface"] <= surface_range[1])]
+        filters += (("surface", "between", tuple(surface_range)),)
 
 # --- Filtre Nombre de pièces ---
-if "rooms" in df.columns:
-    rooms_range = safe_slider("Nombre de pièces 🛏️", df["rooms"])
+if backend.has("rooms"):
+    rooms_range = safe_slider("Nombre de pièces 🛏️", backend.bounds("rooms", filters))
     if rooms_range[0] is not None:
-        df = df[(df["rooms"] >= rooms_range[0]) & (df["rooms"] <= rooms_range[1])]
-        
+        filters += (("rooms", "between", tuple(rooms_range)),)
+
+# Sélections triées : l'ordre des clics ne change pas la clé des caches
 # --- Filtre DPE ---
-if "DPE" in df.columns:
-    dpe_options = sorted(df["DPE"].dropna().unique())
+if backend.has("DPE"):
+    dpe_options = backend.options("DPE", filters)
     dpe_selection = st.sidebar.multiselect("Classe DPE ♻️", options=dpe_options, default=[])
     if dpe_selection:
-        df = df[df["DPE"].isin(dpe_selection)]
+        filters += (("DPE", "in", tuple(sorted(dpe_selection))),)
 
 # --- Filtre GES ---
-if "GES" in df.columns:
-    ges_options = sorted(df["GES"].dropna().unique())
+if backend.has("GES"):
+    ges_options = backend.options("GES", filters)
     ges_selection = st.sidebar.multiselect("Classe GES 🌱", options=ges_options, default=[])
     if ges_selection:
-        df = df[df["GES"].isin(ges_selection)]
+        filters += (("GES", "in", tuple(sorted(ges_selection))),)
 
 # --- Filtre Extérieur ---
-if "exterieur" in df.columns:
-    ext_options = sorted(df["exterieur"].dropna().unique())
+if backend.has("exterieur"):
+    ext_options = backend.options("exterieur", filters)
     ext_selection = st.sidebar.multiselect("Type d'extérieur 🏘️", options=ext_options, default=[])
     if ext_selection:
-        df = df[df["exterieur"].isin(ext_selection)]
+        filters += (("exterieur", "in", tuple(sorted(ext_selection))),)
 
 # --- Filtre Stationnement ---
-if "stationnement" in df.columns:
-    park_options = sorted(df["stationnement"].dropna().unique())
+if backend.has("stationnement"):
+    park_options = backend.options("stationnement", filters)
     park_selection = st.sidebar.multiselect("Type de stationnement 🅿️", options=park_options, default=[])
     if park_selection:
-        df = df[df["stationnement"].isin(park_selection)]
+        filters += (("stationnement", "in", tuple(sorted(park_selection))),)
+
+# État normalisé des filtres : deux sessions avec les mêmes choix partagent les mêmes résultats
+# Version lue par le moteur lui-même : un rafraîchissement en cours de script ne peut pas ranger
+# des résultats de l'ancien fichier sous la version du nouveau
+result_key = (backend.version, backend.name, filters)
+result = results.get("filtres", result_key, lambda: backend.summarize(filters))
+kpis = result["kpis"]
+# Identifiant de l'état des filtres pour les exports sur disque
+filter_key = hashlib.blake2b(repr((backend.name, filters)).encode(), digest_size=16).hexdigest()
+
+cache_stats = results.stats()
+st.sidebar.caption(
+    f"♻️ Résultats partagés entre sessions : {cache_stats['hit_rate']:.0%} de succès "
+    f"({cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']}), "
+    f"{cache_stats['entries']} entrée(s), {cache_stats['bytes'] / 1e6:.1f} Mo"
+)
+
+# --- Mémoire tenue par le moteur de requête de ce processus ---
+with st.sidebar.expander(f"🧠 Mémoire des données ({backend.name})"):
+    memory = data_memory_report()
+    if memory.empty:
+        st.caption("Aucune table en mémoire : les requêtes lisent le fichier de données.")
+    else:
+        by_table = memory.groupby("table", sort=False)["octets"].sum()
+        st.caption(" — ".join(f"{table} : {octets / 1e6:.2f} Mo" for table, octets in by_table.items()))
+        st.dataframe(
+            memory.sort_values("octets", ascending=False).assign(Ko=lambda m: (m["octets"] / 1024).round(1))
+                  .drop(columns="octets"),
+            hide_index=True, use_container_width=True,
+        )
+
+
+def map_table(zoom):
+    """Table envoyée à la carte pour l'état des filtres : cellules agrégées (zoom) ou points (zoom=None)."""
+    return results.get("carte", result_key + (zoom,),
+                       lambda: backend.map_points(filters) if zoom is None else backend.map_bins(filters, zoom))
+
 
 # 3. Onglets
-tab1, tab2, tab3 = st.tabs(["📊 Statistiques", "🗺️ Carte", "🗃️ Données"])
+tab1, tab2, tab3, tab4 = st.tabs(["📊 Statistiques", "🗺️ Carte", "🗃️ Données", "📈 Tendances"])
 
 with tab1:
     st.subheader("📈 Quelques données clés :")
     col1, col2, col3 = st.columns(3)
-    col1.metric("💰 Prix moyen", f"{df['price'].mean():.0f} €" if not df.empty else "N/A")
-    col2.metric("📐 Surface moyenne", f"{df['surface'].mean():.1f} m²" if not df.empty else "N/A")
-    col3.metric("📌 Nombre d'annonces", f"{len(df)}")
+    col1.metric("💰 Prix moyen", f"{kpis['prix_moyen']:.0f} €" if kpis["prix_moyen"] is not None else "N/A")
+    col2.metric("📐 Surface moyenne", f"{kpis['surface_moyenne']:.1f} m²" if kpis["surface_moyenne"] is not None else "N/A")
+    col3.metric("📌 Nombre d'annonces", f"{kpis['nombre']}")
 
     st.subheader("🌇 Informations sur la ville sélectionnée :")
     
-    villes_selectionnees = df["city"].dropna().unique().tolist()
+    villes_selectionnees = result["villes"]
 
     # Afficher seulement si UNE seule ville est sélectionnée
     if len(villes_selectionnees) == 1:
         ville = villes_selectionnees[0]
         st.markdown(f"### 🏙️ {ville}")
 
-        # Récupérer les infos wiki depuis le DF
-        infos_ville = df[df["city"] == ville][["Population", "Superficie", "Densité", "Infos_ville"]].iloc[0]
+        # Fiche wiki de la ville, lue dans la table des villes
+        infos_ville = backend.ville_infos(ville)
 
         # Colonnes population / superficie / densité
         col4, col5, col6 = st.columns(3)
@@ -204,28 +297,9 @@ with tab1:
 
     st.subheader("📋 Tableau de synthèse par ville")
 
-    # Simulation de futures notes (exemple)
-    df_summary = (
-        df.groupby("city")
-        .agg(
-            prix_moyen=("price", "mean"),
-            surface_moyenne=("surface", "mean"),
-            nb_annonces=("reference", "count"),
-            dpe_moyen=("DPE", lambda x: x.mode().iloc[0] if not x.mode().empty else None),
-        )
-        .reset_index()
-    )
-
-    # Placeholder pour les futures colonnes issues du scraper "ville"
-    df_summary["🌿 Environnement"] = [None] * len(df_summary)
-    df_summary["🚦 Transports"] = [None] * len(df_summary)
-    df_summary["🛡️ Sécurité"] = [None] * len(df_summary)
-    df_summary["🩺 Santé"] = [None] * len(df_summary)
-    df_summary["⚽ Sports & loisirs"] = [None] * len(df_summary)
-    df_summary["🎨 Culture"] = [None] * len(df_summary)
-    df_summary["📚 Enseignement"] = [None] * len(df_summary)
-    df_summary["🛒 Commerces"] = [None] * len(df_summary)
-    df_summary["❤️ Qualité de vie"] = [None] * len(df_summary)
+    # Synthèse partagée entre sessions (cache de résultats), pré-calculée ou agrégée selon les filtres.
+    # Les notes Ville Idéale ont leur propre fichier (étape notes_villes) : jointure hors cache, sur la ville
+    df_summary = result["summary"].merge(load_city_scores(), on="city", how="left")
 
     st.dataframe(
         df_summary.style.format({
@@ -240,37 +314,50 @@ with tab1:
 with tab2:
     st.subheader("📍 Carte interactive des annonces")
 
-    if {"latitude", "longitude"}.issubset(df.columns) and not df.empty:
-        df_map = df.dropna(subset=["latitude", "longitude"]).copy()
-        df_map["price_per_m2_fmt"] = df_map["price_per_m2"].apply(lambda x: f"{x:.2f}")
-        # Vérification qu'on a les colonnes nécessaires pour le tooltip
-        for col in ["price", "surface", "price_per_m2", "DPE", "GES"]:
-            if col not in df_map.columns:
-                df_map[col] = None
-
-        # Conversion des colonnes pour éviter les NaN dans le tooltip
-        df_map["price"] = df_map["price"].fillna(0).astype(int)
-        df_map["surface"] = df_map["surface"].fillna(0).astype(float)
-        df_map["price_per_m2"] = df_map["price_per_m2"].fillna(0).astype(float)
+    if backend.has("latitude") and backend.has("longitude") and kpis["nombre"] > 0:
+        # Nombre d'annonces géolocalisées, (min, max, moyenne) des latitudes et longitudes
+        extent = results.get("carte", result_key + ("étendue",), lambda: backend.map_extent(filters))
+        nb_points = extent["count"] if extent is not None else 0
+        # Beaucoup d'annonces : agrégation côté serveur en cellules dont la taille suit le zoom
+        aggregated = nb_points > MAP_POINT_THRESHOLD
+        if aggregated:
+            zoom = st.slider(
+                "🔍 Zoom (taille des cellules)", 3, 14,
+                fit_zoom(np.array(extent["latitude"][:2]), np.array(extent["longitude"][:2])),
+            )
+            st.caption(f"{nb_points} annonces regroupées par cellule (nombre et prix/m² médian)")
+            df_map = map_table(zoom)
+        else:
+            df_map = map_table(None)
 
         if df_map.empty:
             st.warning("⚠️ Aucune annonce à afficher avec les filtres actuels.")
         else:
             import pydeck as pdk
 
-            layer = pdk.Layer(
-                "ScatterplotLayer",
-                data=df_map,
-                get_position=["longitude", "latitude"],
-                get_color="[255, 140, 0, 180]",
-                get_radius="price_per_m2 / 3 + 200",  # bulle lisible même à bas prix
-                pickable=True,
-            )
+            if aggregated:
+                layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=df_map,
+                    get_position=["longitude", "latitude"],
+                    get_color="[255, 220 - color_t * 180, 0, 180]",  # plus rouge = plus cher
+                    get_radius="radius",
+                    pickable=True,
+                )
+            else:
+                layer = pdk.Layer(
+                    "ScatterplotLayer",
+                    data=df_map,
+                    get_position=["longitude", "latitude"],
+                    get_color="[255, 140, 0, 180]",
+                    get_radius="price_per_m2 / 3 + 200",  # bulle lisible même à bas prix
+                    pickable=True,
+                )
 
             view_state = pdk.ViewState(
-                latitude=float(df_map["latitude"].mean()),
-                longitude=float(df_map["longitude"].mean()),
-                zoom=6 if len(df_map) > 5 else 9,
+                latitude=float(extent["latitude"][2]),
+                longitude=float(extent["longitude"][2]),
+                zoom=zoom if aggregated else (6 if len(df_map) > 5 else 9),
                 pitch=0,
             )
 
@@ -280,6 +367,9 @@ with tab2:
             # ✅ Tooltip corrigé (affiche toutes les infos)
             tooltip = {
                 "html": """
+                    <b>{count} annonces</b><br/>
+                    💶 Prix/m² médian : {median_fmt} €/m²
+                """ if aggregated else """
                     <b>{city}</b><br/>
                     💰 Prix : {price} €<br/>
                     📏 Surface : {surface} m²<br/>
@@ -309,8 +399,18 @@ with tab2:
 
 with tab3:
     st.subheader("📥 Télécharger les données filtrées")
+
+    # Seule la page affichée est envoyée au navigateur
+    col_page_size, col_page = st.columns(2)
+    page_size = col_page_size.selectbox("Annonces par page", [25, 50, 100, 250], index=1)
+    nb_pages = max(1, math.ceil(kpis["nombre"] / page_size))
+    page = col_page.number_input(f"Page (sur {nb_pages})", min_value=1, max_value=nb_pages, value=1)
+    start = (page - 1) * page_size
+    st.caption(f"Annonces {min(start + 1, kpis['nombre'])} à {min(start + page_size, kpis['nombre'])} "
+               f"sur {kpis['nombre']}")
+
     st.data_editor(
-        df,
+        backend.page(filters, start, page_size),
         use_container_width=True,
         column_config={
             "latitude": None,
@@ -320,13 +420,44 @@ with tab3:
         disabled=True
     )
 
+    # Le fichier n'est construit qu'au clic, puis réutilisé tant que données et filtres sont identiques
+    export_format = st.radio("Format", list(FORMATS), horizontal=True)
+    file_name, mime = FORMATS[export_format]
     st.download_button(
-        "Télécharger CSV filtré",
-        df.to_csv(index=False).encode("utf-8-sig"),
-        "annonces_filtrees.csv",
-        "text/csv",
+        f"Télécharger {export_format} filtré",
+        partial(export_file, partial(backend.frame, filters), backend.version, filter_key, export_format,
+                prepare=backend.prepare),
+        file_name,
+        mime,
         key="download-csv"
     )
 
 
+with tab4:
+    st.subheader("📈 Évolution des prix par ville")
 
+    # Lecture des seuls agrégats par ville et par jour : l'historique des annonces n'est jamais relu
+    trends = load_price_trends()
+    villes_filtrees = result["villes"]
+    if trends is not None:
+        trends = trends[trends["city"].isin(villes_filtrees)]
+    if trends is None or trends.empty:
+        st.info("ℹ️ L'historique des prix se construit à chaque actualisation des données.")
+    else:
+        st.caption(f"{trends['date'].nunique()} jour(s) d'historique pour {trends['city'].nunique()} ville(s) "
+                   "(filtre sur les villes uniquement)")
+        if trends["city"].nunique() > 8:
+            # Trop de villes pour une courbe chacune : agrégats additionnés par jour
+            trends = trends.groupby("date", as_index=False)[["price_sum", "price_count", "ppm2_sum", "ppm2_count"]].sum()
+            trends["prix_moyen"] = trends["price_sum"] / trends["price_count"]
+            trends["prix_m2_moyen"] = trends["ppm2_sum"] / trends["ppm2_count"]
+            trends["city"] = "Villes filtrées"
+
+        for column, title in [("prix_m2_moyen", "💶 Prix/m² moyen (€)"), ("prix_moyen", "💰 Prix moyen (€)")]:
+            chart = alt.Chart(trends).mark_line(point=True).encode(
+                x=alt.X("date:T", title="Date"),
+                y=alt.Y(f"{column}:Q", title=title),
+                color=alt.Color("city:N", title="Ville"),
+                tooltip=["city", alt.Tooltip("date:T"), alt.Tooltip(f"{column}:Q", format=",.0f")],
+            )
+            st.altair_chart(chart, use_container_width=True)
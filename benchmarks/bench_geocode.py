@@ -0,0 +1,67 @@
+"""Benchmark du géocodage par lots CSV (cleaner.geocode_unique_pairs) et de son repli ligne à ligne.
+
+Démarre le géocodeur local de benchmarks/geocoder_stub.py, géocode n couples (code postal, ville)
+synthétiques et vérifie que chaque couple reçoit ses propres coordonnées, puis recommence avec
+des réponses CSV tronquées : le lot doit basculer sur le repli ligne à ligne sans décaler les lignes.
+
+Usage (depuis la racine du projet) : python benchmarks/bench_geocode.py [nb_couples]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+from geocoder_stub import INCONNUE, GeocoderStub, coordinates  # noqa: E402
+
+
+def synthetic_pairs(n, prefix):
+    """n couples distincts, dont une ville inconnue du géocodeur toutes les 50 lignes."""
+    return pd.DataFrame({
+        "postal_code": [f"{(i % 95) + 1:02d}{i % 1000:03d}" for i in range(n)],
+        "city": [INCONNUE if i % 50 == 49 else f"{prefix}-{i}" for i in range(n)],
+    })
+
+
+def check(df, coords):
+    """Chaque couple géocodé a les coordonnées que le géocodeur lui attribue."""
+    got = df.merge(coords, on=["postal_code", "city"], how="left")
+    for p, c, lat, lon in got.itertuples(index=False):
+        attendu = coordinates(p, c) or (None, None)
+        if (None if pd.isna(lat) else lat, None if pd.isna(lon) else lon) != attendu:
+            raise AssertionError(f"{p} {c} : {(lat, lon)} au lieu de {attendu}")
+
+
+def main(n):
+    stub = GeocoderStub().start()
+    # Avant l'import : cleaner lit l'URL du géocodeur et le cache lit son fichier au chargement
+    os.environ["IMMO_GEOCODER_URL"] = stub.url
+    os.environ["IMMO_CACHE_FILE"] = os.path.join(tempfile.mkdtemp(prefix="immo_geo_"), "cache.sqlite")
+    from cleaner import GEOCODAGE_CHUNK, geocode_unique_pairs
+
+    df = synthetic_pairs(n, "Ville")
+    start = time.perf_counter()
+    coords = geocode_unique_pairs(df)
+    elapsed = time.perf_counter() - start
+    check(df, coords)
+    print(f"✅ {n} couples : {stub.requests['/search/csv/']} envoi(s) CSV de {GEOCODAGE_CHUNK} lignes max, "
+          f"{stub.requests['/search/']} requête(s) unitaire(s), {elapsed:.2f}s")
+
+    # Réponses tronquées : le lot incomplet est refait ligne à ligne
+    stub.perdues = 1
+    before = dict(stub.requests)
+    m = min(n, 200)
+    df = synthetic_pairs(m, "Tronquee")
+    start = time.perf_counter()
+    coords = geocode_unique_pairs(df)
+    check(df, coords)
+    print(f"✅ Réponses tronquées : {stub.requests['/search/csv/'] - before['/search/csv/']} envoi(s) CSV, "
+          f"{stub.requests['/search/'] - before['/search/']} requête(s) unitaire(s) pour {m} couples, "
+          f"{time.perf_counter() - start:.2f}s")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -0,0 +1,60 @@
+"""Benchmark de l'extraction des pages annonces (scraper_annonces.parse_annonce).
+
+Relit les pages enregistrées dans benchmarks/fixtures/etreproprio, vérifie que les
+enregistrements extraits sont exactement ceux de expected.json, puis compare le temps
+de l'extraction ciblée à celui d'une analyse complète avec html.parser (ce que coûtait
+au minimum l'ancienne version, avant même la moindre recherche).
+
+Usage (depuis la racine du projet) : python benchmarks/bench_html.py [nb_passes]
+"""
+import json
+import os
+import sys
+import time
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+from scraper_annonces import parse_annonce  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "etreproprio")
+
+
+def load_corpus():
+    with open(os.path.join(FIXTURES, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    pages = []
+    for item in expected:
+        with open(os.path.join(FIXTURES, item["file"]), "rb") as f:
+            pages.append((item["file"], item["record"], f.read()))
+    return pages
+
+
+def timed(label, func, pages, passes):
+    start = time.perf_counter()
+    for _ in range(passes):
+        for _, record, content in pages:
+            func(record["link"], content)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<22} {elapsed / (passes * len(pages)) * 1000:8.2f} ms / page")
+    return elapsed
+
+
+def main(passes):
+    pages = load_corpus()
+    print(f"📄 {len(pages)} pages enregistrées")
+
+    for name, record, content in pages:
+        got = parse_annonce(record["link"], content)
+        if got != record:
+            diff = {k: (record[k], got.get(k)) for k in record if got.get(k) != record[k]}
+            raise AssertionError(f"{name} : {diff}")
+    print("✅ Enregistrements identiques à expected.json")
+
+    t_full = timed("html.parser complet", lambda link, c: BeautifulSoup(c, "html.parser"), pages, passes)
+    t_fast = timed("extraction ciblée", parse_annonce, pages, passes)
+    print(f"  speedup                x{t_full / t_fast:.1f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20)
@@ -0,0 +1,48 @@
+"""Rapport mémoire du tableau de bord : annonces telles que lues avant compactage, puis format compact.
+
+Lit un fichier nettoyé (CSV ou Parquet), éventuellement répété `copies` fois pour simuler
+un plus gros crawl, et affiche par colonne la mémoire occupée (chaînes comprises) :
+- avant : toutes les colonnes lues telles quelles, fiche Wikipédia répétée sur chaque annonce ;
+- après : annonces compactes (catégories, numériques réduits) + table des villes.
+
+Usage (depuis la racine du projet) :
+    python benchmarks/bench_memory.py [data/cleaned_data.parquet] [copies]
+"""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from compact import compact_listings, memory_report, split_city_infos  # noqa: E402
+
+
+def read(path, copies):
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    if "removed" in df.columns:
+        df = df[~df["removed"]]
+    if copies > 1:
+        df = pd.concat([df.assign(link=df["link"] + f"#{i}") for i in range(copies)], ignore_index=True)
+    return df.reset_index(drop=True)
+
+
+def main(path, copies):
+    df = read(path, copies)
+    avant = memory_report({"annonces": df})
+    apres = memory_report({"annonces": compact_listings(df), "villes": split_city_infos(df)})
+
+    par_colonne = avant.groupby("colonne", sort=False)["octets"].sum().rename("avant").to_frame().join(
+        apres.groupby("colonne", sort=False)["octets"].sum().rename("après"), how="outer").fillna(0)
+    par_colonne = par_colonne.sort_values("avant", ascending=False)
+    print(f"📊 {len(df)} annonces, {df['city'].nunique()} villes ({path}, x{copies})")
+    print((par_colonne / 1024).round(1).rename(columns=lambda c: f"{c} (Ko)").to_string())
+
+    total_avant, total_apres = avant["octets"].sum(), apres["octets"].sum()
+    print(f"🧠 Total : {total_avant / 1e6:.1f} Mo -> {total_apres / 1e6:.1f} Mo "
+          f"({total_apres / total_avant:.0%}, dont table des villes "
+          f"{apres.loc[apres['table'] == 'villes', 'octets'].sum() / 1e6:.2f} Mo)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "data/cleaned_data.csv",
+         int(sys.argv[2]) if len(sys.argv) > 2 else 1)
@@ -0,0 +1,73 @@
+"""Benchmark des parseurs de cleaner.py (ligne à ligne vs vectorisé).
+
+Génère un raw_data.csv synthétique à partir des annonces de data/raw_data.csv,
+vérifie que les deux versions donnent le même résultat et affiche les temps.
+
+Usage (depuis la racine du projet) : python benchmarks/bench_parsing.py [nb_lignes]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+from cleaner import (  # noqa: E402
+    extract_postal_and_city,
+    extract_postal_and_city_columns,
+    extract_rooms,
+    extract_rooms_column,
+)
+
+# Cas limites ajoutés aux vraies annonces
+EXTRA_LOCATIONS = [None, "— Paris 11e —", "Lyon (69003)", "75001 Paris 75001", "13001 / 13002 Marseille", "   "]
+EXTRA_ROOMS = [None, "Studio", "5 pièces", "10 pièces"]
+
+
+def make_raw(n, path, seed=0):
+    """Écrit un raw_data.csv synthétique de n lignes."""
+    base = pd.read_csv("data/raw_data.csv")
+    rng = np.random.default_rng(seed)
+    locations = np.array(base["location"].tolist() + EXTRA_LOCATIONS, dtype=object)
+    rooms = np.array(base["rooms"].tolist() + EXTRA_ROOMS, dtype=object)
+    df = pd.DataFrame({
+        "location": locations[rng.integers(0, len(locations), n)],
+        "rooms": rooms[rng.integers(0, len(rooms), n)],
+    })
+    df.to_csv(path, index=False, encoding="utf-8-sig")
+
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<12} {elapsed:8.2f} s")
+    return result, elapsed
+
+
+def main(n):
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "raw_data.csv")
+        make_raw(n, path)
+        df = pd.read_csv(path)
+    print(f"📊 {len(df)} lignes synthétiques")
+
+    print("rooms")
+    old, t_old = timed("apply", lambda s: s.apply(extract_rooms), df["rooms"])
+    new, t_new = timed("vectorisé", extract_rooms_column, df["rooms"])
+    pd.testing.assert_series_equal(old.astype(float), new.astype(float))
+    print(f"  speedup      x{t_old / t_new:.1f}")
+
+    print("postal_code / city")
+    old, t_old = timed("apply", lambda s: s.apply(extract_postal_and_city), df["location"])
+    new, t_new = timed("vectorisé", extract_postal_and_city_columns, df["location"])
+    old.columns = ["postal_code", "city"]
+    pd.testing.assert_frame_equal(old.astype(object).fillna(np.nan), new.astype(object).fillna(np.nan))
+    print(f"  speedup      x{t_old / t_new:.1f}")
+    print("✅ Résultats identiques")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,81 @@
+"""Benchmark de l'enrichissement Wikipédia groupé (scraper_wiki.get_villes_infos).
+
+Démarre l'API locale de benchmarks/wiki_stub.py, vérifie que les villes de
+benchmarks/fixtures/wikipedia/expected.json donnent exactement les fiches attendues,
+puis enrichit n villes synthétiques et affiche le nombre de requêtes et le temps total
+(l'ancienne version chargeait une page HTML complète par ville).
+
+Usage (depuis la racine du projet) : python benchmarks/bench_wiki.py [nb_villes]
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "scripts"))
+from wiki_stub import WikiStub, load_articles  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures", "wikipedia")
+
+
+def nom_commune(i):
+    """Nom fictif sans chiffres ni "e" (que normalize_ville retirerait), unique pour chaque i."""
+    lettres = "abcdfghijklmnopqrstuvwxyz"
+    nom = ""
+    while True:
+        i, r = divmod(i, len(lettres))
+        nom = lettres[r] + nom
+        if i == 0:
+            return f"Commune-{nom.capitalize()}"
+
+
+def synthetic_articles(n):
+    """Articles des fixtures plus n communes fictives, chacune avec population et superficie."""
+    data = load_articles()
+    modele = data["articles"]["Bordeaux"]["extract"].replace("Bordeaux", "{nom}")
+    for i in range(n):
+        nom, qid = nom_commune(i), f"Q{900000 + i}"
+        data["articles"][nom] = {"qid": qid, "extract": modele.format(nom=nom)}
+        data["entites"][qid] = {
+            "population": [{"valeur": 1000 + 37 * i, "rang": "preferred", "date": "2021-01-01"},
+                           {"valeur": 990 + 37 * i, "rang": "normal", "date": "2015-01-01"}],
+            "superficie": [{"valeur": round(5 + i % 40 * 0.7, 2), "unite": "km2"}],
+        }
+    return data
+
+
+def main(n):
+    stub = WikiStub(synthetic_articles(n)).start()
+    # Avant l'import : scraper_wiki lit ses URL et le cache lit son fichier au chargement
+    os.environ["IMMO_WIKI_API_URL"] = f"{stub.url}/w/api.php"
+    os.environ["IMMO_WIKIDATA_SPARQL_URL"] = f"{stub.url}/sparql"
+    os.environ["IMMO_CACHE_FILE"] = os.path.join(tempfile.mkdtemp(prefix="immo_wiki_"), "cache.sqlite")
+    from scraper_wiki import get_villes_infos
+
+    with open(os.path.join(FIXTURES, "expected.json"), encoding="utf-8") as f:
+        expected = json.load(f)
+    got = get_villes_infos([e["ville"] for e in expected])
+    for e in expected:
+        if got[e["ville"]] != e["infos"]:
+            raise AssertionError(f"{e['ville']} : {got[e['ville']]}")
+    print(f"✅ {len(expected)} fiches identiques à expected.json")
+
+    villes = [nom_commune(i) for i in range(n)]
+    before = sum(stub.requests.values())
+    start = time.perf_counter()
+    infos = get_villes_infos(villes, workers=4)
+    elapsed = time.perf_counter() - start
+    requetes = sum(stub.requests.values()) - before
+    trouvees = sum(fiche["population"] is not None for fiche in infos.values())
+    print(f"📊 {n} villes : {requetes} requêtes (au lieu de {n} pages), {elapsed:.2f}s, {trouvees} fiches complètes")
+
+    start = time.perf_counter()
+    get_villes_infos(villes)
+    print(f"♻️ Second passage (déjà en cache) : {sum(stub.requests.values()) - before - requetes} requête(s), "
+          f"{time.perf_counter() - start:.2f}s")
+    stub.stop()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
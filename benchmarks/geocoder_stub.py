@@ -0,0 +1,110 @@
+"""Serveur local qui imite l'API Adresse (api-adresse.data.gouv.fr) : /search/ et /search/csv/.
+
+Chaque couple (code postal, ville) reçoit des coordonnées fictives mais stables (coordinates()),
+pour que cleaner.geocode_batch et cleaner.get_lat_lon puissent être exercés de bout en bout
+sans réseau. `perdues` retire des lignes à la fin de chaque réponse CSV, comme une réponse tronquée.
+
+Usage (depuis la racine du projet) : python benchmarks/geocoder_stub.py [port]
+puis IMMO_GEOCODER_URL=http://127.0.0.1:<port>
+"""
+import csv
+import hashlib
+import io
+import json
+import sys
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+INCONNUE = "Nowhere"  # ville que le géocodeur ne trouve pas
+
+
+def coordinates(postal_code, city):
+    """Coordonnées (latitude, longitude) fictives en France métropolitaine, ou None pour INCONNUE."""
+    if city == INCONNUE:
+        return None
+    h = int.from_bytes(hashlib.blake2b(f"{postal_code}|{city}".encode(), digest_size=8).digest(), "big")
+    return round(42 + (h % 9000) / 1000, 6), round(-4 + (h // 9000 % 12000) / 1000, 6)
+
+
+def csv_response(data, perdues=0):
+    """Réponse de /search/csv/ : colonnes envoyées puis latitude et longitude, dans l'ordre d'envoi."""
+    rows = list(csv.DictReader(io.StringIO(data)))
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["postal_code", "city", "latitude", "longitude"])
+    for row in rows[:max(len(rows) - perdues, 0)]:
+        coords = coordinates(row["postal_code"], row["city"]) or ("", "")
+        writer.writerow([row["postal_code"], row["city"], *coords])
+    return out.getvalue()
+
+
+def search_response(postal_code, city):
+    """Réponse GeoJSON de /search/ (un seul résultat au plus)."""
+    coords = coordinates(postal_code, city)
+    features = [] if coords is None else [
+        {"type": "Feature", "geometry": {"type": "Point", "coordinates": [coords[1], coords[0]]},
+         "properties": {"postcode": postal_code, "city": city}}]
+    return {"type": "FeatureCollection", "features": features}
+
+
+class GeocoderStub:
+    """Serveur HTTP en tâche de fond ; `requests` compte les appels par chemin."""
+
+    def __init__(self, port=0, perdues=0):
+        self.perdues = perdues
+        self.requests = {"/search/": 0, "/search/csv/": 0}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, body, content_type):
+                body = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/search/":
+                    self.send_error(404)
+                    return
+                stub.requests[url.path] += 1
+                query = parse_qs(url.query)
+                reponse = search_response(query.get("postcode", [""])[0], query.get("q", [""])[0])
+                self._send(json.dumps(reponse), "application/json; charset=utf-8")
+
+            def do_POST(self):
+                if self.path != "/search/csv/":
+                    self.send_error(404)
+                    return
+                stub.requests[self.path] += 1
+                body = self.rfile.read(int(self.headers["Content-Length"]))
+                form = BytesParser(policy=HTTP).parsebytes(
+                    f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode() + body)
+                fichier = next(p for p in form.iter_parts() if p.get_param("name", header="content-disposition") == "data")
+                data = fichier.get_payload(decode=True).decode("utf-8")
+                self._send(csv_response(data, stub.perdues), "text/csv; charset=utf-8")
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    stub = GeocoderStub(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8765)
+    print(f"🌐 Géocodeur local : {stub.url}/search/ et {stub.url}/search/csv/")
+    stub.server.serve_forever()
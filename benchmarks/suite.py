@@ -0,0 +1,285 @@
+"""Suite de benchmarks hors ligne : parsing, étapes du cleaner et filtres du tableau de bord.
+
+- parsing : pages enregistrées dans benchmarks/fixtures (etreproprio, Ville Idéale) et réponses
+  des API Wikipédia / Wikidata (benchmarks/wiki_stub.py), vérifiées contre les expected.json
+  avant d'être chronométrées ;
+- cleaner : chaque étape de clean_listings sur un raw_data.csv synthétique (benchmarks/synth.py),
+  avec un cache disque temporaire pré-rempli : aucune requête réseau ;
+- app : lecture du Parquet, index de filtres, filtres, KPI, synthèse par ville et carte,
+  comme dans app.py, puis filtres, synthèse et carte avec le moteur DuckDB (app/<taille>/duckdb/...).
+
+Chaque cas garde le meilleur de plusieurs essais, puis est comparé à benchmarks/baselines.json.
+Code de sortie 1 si un cas régresse au-delà de la tolérance.
+
+Usage (depuis la racine du projet) :
+    python benchmarks/suite.py [--sizes 10k,100k,1m] [--only parsing,cleaner,app]
+                               [--tolerance 0.3] [--update] [--output resultats.json]
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Cache disque jetable et géocodeur injoignable : rien ne doit partir sur le réseau
+TMP = tempfile.mkdtemp(prefix="immo_bench_")
+os.environ["IMMO_CACHE_FILE"] = os.path.join(TMP, "cache.sqlite")
+os.environ.setdefault("IMMO_GEOCODER_URL", "http://127.0.0.1:9")
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import cleaner  # noqa: E402
+from cache import cache, make_key  # noqa: E402
+from city_summary import city_partials, finalize_summary  # noqa: E402
+from compact import CITY_INFO_COLUMNS, compact_listings  # noqa: E402
+from data_access import APP_COLUMNS  # noqa: E402
+from filter_index import FilterIndex  # noqa: E402
+from map_bins import MAP_POINT_THRESHOLD, fit_zoom, grid_bins, point_table  # noqa: E402
+from query_backend import DuckDBBackend  # noqa: E402
+from scraper_annonces import parse_annonce  # noqa: E402
+from scraper_ville_ideale import parse_scores, parse_search  # noqa: E402
+from scraper_wiki import build_infos, normalize_ville, parse_chiffres, parse_pages  # noqa: E402
+from synth import make_raw, parse_size  # noqa: E402
+from wiki_stub import load_articles, query_response, sparql_response  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines.json")
+MIN_ECART = 0.005  # en dessous de 5 ms d'écart, une variation n'est pas une régression
+
+
+def best_of(func, repeat, setup=None):
+    """Meilleur temps (s) sur `repeat` essais ; `setup()` prépare l'argument hors chrono."""
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup() if setup is not None else None
+        start = time.perf_counter()
+        func(arg) if setup is not None else func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def _read(*parts, binary=False):
+    with open(os.path.join(FIXTURES, *parts), "rb" if binary else "r", **({} if binary else {"encoding": "utf-8"})) as f:
+        return f.read()
+
+
+def _expected(source):
+    return json.loads(_read(source, "expected.json"))
+
+
+# --- Parsing ---
+def bench_parsing(results, repeat=10):
+    annonces = [(e["record"], _read("etreproprio", e["file"], binary=True)) for e in _expected("etreproprio")]
+    for record, content in annonces:
+        assert parse_annonce(record["link"], content) == record, f"etreproprio : {record['link']}"
+
+    # Wikipédia : une réponse groupée de chaque API pour toutes les villes, comme scraper_wiki
+    wiki = _expected("wikipedia")
+    articles = load_articles()
+    titres = sorted({normalize_ville(e["ville"]) for e in wiki})
+    reponse_pages = json.dumps(query_response(articles, titres))
+    qids = [p["pageprops"]["wikibase_item"] for p in json.loads(reponse_pages)["query"]["pages"] if "pageprops" in p]
+    reponse_chiffres = json.dumps(sparql_response(articles, " ".join(f"wd:{q}" for q in qids)))
+
+    def parse_wiki():
+        pages = parse_pages(titres, json.loads(reponse_pages))
+        chiffres = parse_chiffres(json.loads(reponse_chiffres))
+        return [build_infos(e["ville"], pages.get(normalize_ville(e["ville"])), chiffres) for e in wiki]
+
+    for e, infos in zip(wiki, parse_wiki()):
+        assert infos == e["infos"], f"wikipedia : {e['ville']}"
+
+    vi = _expected("ville_ideale")
+    recherches = [_read("ville_ideale", e["recherche"]) for e in vi]
+    pages = [_read("ville_ideale", e["page"]) for e in vi if e["page"]]
+    for e, html in zip(vi, recherches):
+        href = parse_search(html)
+        assert (href is not None) == (e["page"] is not None), f"ville_ideale : {e['ville']}"
+        if e["page"]:
+            scores = parse_scores(_read("ville_ideale", e["page"]))
+            assert (scores or dict.fromkeys(e["scores"])) == e["scores"], f"ville_ideale : {e['ville']}"
+
+    # Temps moyen par page
+    results["parsing/etreproprio"] = best_of(
+        lambda: [parse_annonce(r["link"], c) for r, c in annonces], repeat) / len(annonces)
+    results["parsing/wikipedia"] = best_of(parse_wiki, repeat) / len(wiki)
+    results["parsing/ville_ideale_recherche"] = best_of(
+        lambda: [parse_search(h) for h in recherches], repeat) / len(recherches)
+    results["parsing/ville_ideale_notes"] = best_of(
+        lambda: [parse_scores(h) for h in pages], repeat) / len(pages)
+
+
+# --- Cleaner ---
+def seed_cache(raw):
+    """Pré-remplit le cache disque (Wikipédia, géocodage) pour toutes les villes du jeu synthétique."""
+    lieux = cleaner.extract_postal_and_city_columns(raw["location"]).dropna().drop_duplicates()
+    fiches = [e["infos"] for e in _expected("wikipedia")]
+    rng = np.random.default_rng(0)
+    for i, city in enumerate(lieux["city"].unique()):
+        key = make_key((city,))
+        if not cache.get("wikipedia", key)[0]:
+            cache.set("wikipedia", key, dict(fiches[i % len(fiches)], ville=city))
+    for postal_code, city in lieux.itertuples(index=False):
+        key = make_key((postal_code, city))
+        if not cache.get("geocodage", key)[0]:
+            cache.set("geocodage", key, [float(rng.uniform(42, 51)), float(rng.uniform(-4, 8))])
+
+
+def bench_cleaner(results, label, raw, repeat):
+    seed_cache(raw)
+    df = raw
+    for name, stage in cleaner.CLEANING_STAGES:
+        results[f"cleaner/{label}/{name}"] = best_of(stage, repeat, setup=lambda: df.copy())
+        df = stage(df.copy())
+    df["removed"] = False
+    return df
+
+
+# --- Tableau de bord ---
+def bench_app(results, label, cleaned, repeat):
+    path = os.path.join(TMP, f"cleaned_{label}.parquet")
+    cleaner.save_parquet(cleaned, path)
+
+    def load():
+        # Comme data_access : sans la fiche ville, au format compact
+        df = pd.read_parquet(path, columns=[c for c in cleaned.columns if c not in CITY_INFO_COLUMNS],
+                             memory_map=True)
+        return compact_listings(df[~df["removed"]].reset_index(drop=True))
+
+    results[f"app/{label}/chargement"] = best_of(load, repeat)
+    df = load()
+    results[f"app/{label}/index"] = best_of(lambda: FilterIndex(df), repeat)
+    index = FilterIndex(df)
+
+    def filtrer():
+        # Même enchaînement que la barre latérale : bornes puis masques, sélection DPE
+        mask = index.all_rows()
+        low, high = index.bounds("price", mask)
+        mask &= index.range_mask("price", low, (low + high) / 2)
+        low, high = index.bounds("surface", mask)
+        mask &= index.range_mask("surface", low, high)
+        dpe = index.options("DPE", mask)[:3]
+        mask &= index.category_mask("DPE", dpe)
+        for col in ("GES", "exterieur", "stationnement"):
+            index.options(col, mask)
+        return df.iloc[index.rows(mask)]
+
+    results[f"app/{label}/filtres"] = best_of(filtrer, repeat)
+    filtered = filtrer()
+    results[f"app/{label}/kpi"] = best_of(
+        lambda: (filtered["price"].mean(), filtered["surface"].mean(), filtered["city"].dropna().unique()), repeat)
+    results[f"app/{label}/synthese"] = best_of(lambda: finalize_summary(city_partials(filtered)), repeat)
+
+    def carte():
+        valid = filtered.dropna(subset=["latitude", "longitude"])
+        if len(valid) > MAP_POINT_THRESHOLD:
+            return grid_bins(valid, fit_zoom(valid["latitude"], valid["longitude"]))
+        return point_table(valid)
+
+    results[f"app/{label}/carte"] = best_of(carte, repeat)
+
+    # Mêmes étapes avec le moteur DuckDB : requêtes sur le Parquet, rien n'est chargé à l'avance
+    backend = DuckDBBackend((path,), path, APP_COLUMNS)
+
+    def filtrer_sql():
+        filters = ()
+        low, high = backend.bounds("price", filters)
+        filters += (("price", "between", (low, (low + high) / 2)),)
+        filters += (("surface", "between", backend.bounds("surface", filters)),)
+        filters += (("DPE", "in", tuple(backend.options("DPE", filters)[:3])),)
+        for col in ("GES", "exterieur", "stationnement"):
+            backend.options(col, filters)
+        return filters
+
+    results[f"app/{label}/duckdb/filtres"] = best_of(filtrer_sql, repeat)
+    filters = filtrer_sql()
+    results[f"app/{label}/duckdb/synthese"] = best_of(lambda: backend.summarize(filters), repeat)
+
+    def carte_sql():
+        extent = backend.map_extent(filters)
+        if extent["count"] > MAP_POINT_THRESHOLD:
+            return backend.map_bins(filters, fit_zoom(extent["latitude"][:2], extent["longitude"][:2]))
+        return backend.map_points(filters)
+
+    results[f"app/{label}/duckdb/carte"] = best_of(carte_sql, repeat)
+
+
+# --- Comparaison aux références ---
+def compare(results, baselines, tolerance):
+    regressions = []
+    print(f"\n{'cas':<42} {'temps':>10} {'référence':>10} {'ratio':>7}")
+    for name, value in results.items():
+        base = baselines.get(name)
+        if base is None:
+            print(f"{name:<42} {value * 1000:8.2f}ms {'—':>10} {'':>7}")
+            continue
+        ratio = value / base if base else float("inf")
+        regressed = ratio > 1 + tolerance and value - base > MIN_ECART
+        flag = " ⚠️" if regressed else ""
+        print(f"{name:<42} {value * 1000:8.2f}ms {base * 1000:8.2f}ms {ratio:6.2f}x{flag}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne du pipeline et du tableau de bord")
+    parser.add_argument("--sizes", default="10k,100k", help="tailles synthétiques (10k, 100k, 1m ou un entier)")
+    parser.add_argument("--only", default="parsing,cleaner,app", help="groupes à lancer")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="ralentissement toléré (0.3 = +30 %%)")
+    parser.add_argument("--update", action="store_true", help="enregistre les temps comme nouvelles références")
+    parser.add_argument("--output", help="écrit les temps mesurés dans ce fichier JSON")
+    args = parser.parse_args()
+    groups = set(args.only.split(","))
+
+    results = {}
+    try:
+        if "parsing" in groups:
+            print("📄 Parsing des pages enregistrées")
+            bench_parsing(results)
+        for label in args.sizes.split(","):
+            n = parse_size(label)
+            repeat = 3 if n <= 100_000 else 1
+            print(f"📊 {label} : {n} annonces synthétiques")
+            raw = make_raw(n)
+            if groups & {"cleaner", "app"}:
+                cleaned = bench_cleaner(results, label, raw, repeat) if "cleaner" in groups else None
+                if "app" in groups:
+                    if cleaned is None:
+                        seed_cache(raw)
+                        cleaned = cleaner.clean_listings(raw.copy()).assign(removed=False)
+                    bench_app(results, label, cleaned, repeat)
+    finally:
+        shutil.rmtree(TMP, ignore_errors=True)
+
+    baselines = {}
+    if os.path.exists(BASELINES):
+        with open(BASELINES, encoding="utf-8") as f:
+            baselines = json.load(f)
+    regressions = compare(results, baselines, args.tolerance)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+    if args.update:
+        baselines.update({k: round(v, 6) for k, v in results.items()})
+        with open(BASELINES, "w", encoding="utf-8", newline="\n") as f:
+            json.dump(baselines, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"💾 Références mises à jour : {BASELINES}")
+    elif regressions:
+        print(f"❌ {len(regressions)} régression(s) au-delà de +{args.tolerance:.0%}")
+        sys.exit(1)
+    else:
+        print("✅ Aucune régression")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Générateurs de données synthétiques pour les benchmarks.
+
+make_raw(n) produit un raw_data.csv réaliste de n annonces à partir des vraies annonces
+de data/raw_data.csv (libellés, DPE, images...) et de villes fictives en plus, pour que
+le nombre de villes distinctes grandisse avec le volume comme sur un vrai crawl.
+
+Usage (depuis la racine du projet) : python benchmarks/synth.py 100k chemin/raw_data.csv
+"""
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+BASE_RAW = os.path.join(os.path.dirname(__file__), "..", "data", "raw_data.csv")
+MISSING_RATE = 0.05  # part de champs vides, comme sur le site
+
+
+def parse_size(label):
+    """'10k', '100k', '1m' ou un entier."""
+    return SIZES[label.lower()] if label.lower() in SIZES else int(label)
+
+
+def _with_missing(rng, values):
+    values = np.asarray(values, dtype=object)
+    values[rng.random(len(values)) < MISSING_RATE] = None
+    return values
+
+
+def make_raw(n, path=None, seed=0):
+    """Annonces brutes synthétiques (colonnes du scraper, tout en texte) ; écrites dans `path` si fourni."""
+    rng = np.random.default_rng(seed)
+    base = pd.read_csv(BASE_RAW, dtype=str)
+
+    def sample(col):
+        values = base[col].to_numpy(dtype=object)
+        return values[rng.integers(0, len(values), n)]
+
+    # Moitié de vraies localisations, moitié de villes fictives (une pour 500 annonces)
+    nb_villes = max(50, n // 500)
+    villes = rng.integers(0, nb_villes, n)
+    fictives = pd.Series([f"— Ville-{v} {10000 + v * 7 % 85000:05d} —" for v in range(nb_villes)])
+    locations = np.where(rng.random(n) < 0.5, sample("location"), fictives.to_numpy()[villes])
+
+    prix = pd.Series(rng.integers(50, 1500, n) * 1000).astype(str)
+    separateur = np.where(rng.random(n) < 0.3, "\xa0€", " €")
+    pieces = rng.integers(1, 8, n)
+    rooms = np.where(pieces == 1, "1 pièce", pd.Series(pieces).astype(str) + " pièces")
+    rooms = np.where(rng.random(n) < 0.02, "Studio", rooms)
+
+    df = pd.DataFrame({
+        "link": [f"https://www.etreproprio.com/immobilier-{30000000 + i}-vente-synthetique" for i in range(n)],
+        "price": _with_missing(rng, prix + separateur),
+        "surface": _with_missing(rng, pd.Series(rng.integers(9, 400, n)).astype(str) + "\xa0m²"),
+        "rooms": _with_missing(rng, rooms),
+        "DPE": sample("DPE"),
+        "GES": sample("GES"),
+        "location": _with_missing(rng, locations),
+        "reference": _with_missing(rng, [f"Référence: S{i}" for i in range(n)]),
+        "exterieur": rng.choice(np.array([None, "Terrasse", "Balcon"], dtype=object), n),
+        "stationnement": rng.choice(np.array([None, "Parking", "Garage", "Stationnement"], dtype=object), n),
+        "image": sample("image"),
+    })
+    if path is not None:
+        df.to_csv(path, index=False, encoding="utf-8-sig")
+    return df
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage : python benchmarks/synth.py <10k|100k|1m|n> <fichier.csv>")
+        sys.exit(1)
+    make_raw(parse_size(sys.argv[1]), sys.argv[2])
+    print(f"✅ {sys.argv[2]} écrit")
@@ -0,0 +1,130 @@
+"""Serveur local qui imite l'API de Wikipédia (action=query) et le point SPARQL de Wikidata.
+
+Les articles servis viennent de benchmarks/fixtures/wikipedia/articles.json (ou de n'importe quel
+dictionnaire de même forme) : titres, redirections, résumés d'introduction, identifiants Wikidata,
+populations et superficies. Les réponses ont la forme de celles des vraies API, pour que
+scraper_wiki puisse être exercé de bout en bout sans réseau.
+
+Usage (depuis la racine du projet) : python benchmarks/wiki_stub.py [port]
+puis IMMO_WIKI_API_URL=http://127.0.0.1:<port>/w/api.php
+     IMMO_WIKIDATA_SPARQL_URL=http://127.0.0.1:<port>/sparql
+"""
+import json
+import os
+import re
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+ARTICLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "wikipedia", "articles.json")
+ENTITY = "http://www.wikidata.org/entity/"
+RANGS = {"preferred": "http://wikiba.se/ontology#PreferredRank", "normal": "http://wikiba.se/ontology#NormalRank"}
+UNITES = {"km2": ENTITY + "Q712226", "ha": ENTITY + "Q35852"}
+
+
+def load_articles(path=ARTICLES):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def query_response(data, titles):
+    """Réponse action=query (formatversion=2) pour une liste de titres."""
+    normalized, redirects, pages = [], [], []
+    for title in titles:
+        cible = title[:1].upper() + title[1:].replace("_", " ")
+        if cible != title:
+            normalized.append({"from": title, "to": cible})
+        if cible in data["redirects"]:
+            redirects.append({"from": cible, "to": data["redirects"][cible]})
+            cible = data["redirects"][cible]
+        article = data["articles"].get(cible)
+        if article is None:
+            pages.append({"ns": 0, "title": cible, "missing": True})
+            continue
+        page = {"pageid": abs(hash(cible)) % 10**7, "ns": 0, "title": cible, "extract": article["extract"]}
+        if article.get("qid"):
+            page["pageprops"] = {"wikibase_item": article["qid"]}
+        pages.append(page)
+    query = {"pages": pages}
+    if normalized:
+        query["normalized"] = normalized
+    if redirects:
+        query["redirects"] = redirects
+    return {"batchcomplete": True, "query": query}
+
+
+def sparql_response(data, requete):
+    """Résultats SPARQL (JSON) : une ligne par population et par superficie des éléments demandés."""
+    bindings = []
+    for qid in re.findall(r"wd:(Q\d+)", requete):
+        entite = data["entites"].get(qid, {})
+        item = {"type": "uri", "value": ENTITY + qid}
+        for pop in entite.get("population", []):
+            row = {"item": item,
+                   "population": {"type": "literal", "value": str(pop["valeur"])},
+                   "rang": {"type": "uri", "value": RANGS[pop["rang"]]}}
+            if pop.get("date"):
+                row["date"] = {"type": "literal", "value": f"{pop['date']}T00:00:00Z"}
+            bindings.append(row)
+        for sup in entite.get("superficie", []):
+            bindings.append({"item": item,
+                             "superficie": {"type": "literal", "value": str(sup["valeur"])},
+                             "unite": {"type": "uri", "value": UNITES[sup["unite"]]}})
+    return {"head": {"vars": ["item", "population", "rang", "date", "superficie", "unite"]},
+            "results": {"bindings": bindings}}
+
+
+class WikiStub:
+    """Serveur HTTP en tâche de fond ; `requests` compte les appels par chemin."""
+
+    def __init__(self, data=None, port=0):
+        self.data = data if data is not None else load_articles()
+        self.requests = {"/w/api.php": 0, "/sparql": 0}
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def _send(self, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                url = urlparse(self.path)
+                if url.path != "/w/api.php":
+                    self.send_error(404)
+                    return
+                stub.requests[url.path] += 1
+                titles = parse_qs(url.query).get("titles", [""])[0].split("|")
+                self._send(query_response(stub.data, titles))
+
+            def do_POST(self):
+                if self.path != "/sparql":
+                    self.send_error(404)
+                    return
+                stub.requests[self.path] += 1
+                form = parse_qs(self.rfile.read(int(self.headers["Content-Length"])).decode("utf-8"))
+                self._send(sparql_response(stub.data, form.get("query", [""])[0]))
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def start(self):
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+if __name__ == "__main__":
+    stub = WikiStub(port=int(sys.argv[1]) if len(sys.argv) > 1 else 8770)
+    print(f"🌐 API Wikipédia locale : {stub.url}/w/api.php et {stub.url}/sparql")
+    stub.server.serve_forever()
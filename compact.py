@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+# Colonnes à peu de valeurs distinctes : un code par ligne et un dictionnaire de libellés
+# (location : « — Ville code postal — », une valeur par commune)
+CATEGORY_COLUMNS = ["city", "DPE", "GES", "exterieur", "stationnement", "postal_code", "location"]
+# Fiche Wikipédia de la ville, identique sur toutes les annonces d'une même ville
+CITY_INFO_COLUMNS = ["Population", "Superficie", "Densité", "Infos_ville"]
+
+
+def compact_listings(df):
+    """Annonces au format compact : catégories, entiers au plus petit type, flottants en float32 si exact.
+
+    Aucune valeur ne change : un flottant ne passe en float32 que si toute la colonne y est
+    représentable (prix, surfaces, pièces entiers) ; coordonnées et prix au m² restent en float64,
+    et les exports gardent les valeurs du fichier nettoyé. Les colonnes de la fiche ville
+    sont retirées : elles vivent dans la table des villes (split_city_infos).
+    """
+    df = df.drop(columns=[c for c in CITY_INFO_COLUMNS if c in df.columns])
+    types = {}
+    for col in df.columns:
+        dtype = df[col].dtype
+        if col in CATEGORY_COLUMNS:
+            if not isinstance(dtype, pd.CategoricalDtype):
+                types[col] = "category"
+        elif pd.api.types.is_bool_dtype(dtype):
+            continue
+        elif pd.api.types.is_integer_dtype(dtype):
+            types[col] = pd.to_numeric(df[col], downcast="integer").dtype
+        elif pd.api.types.is_float_dtype(dtype) and dtype != np.float32:
+            values = df[col].to_numpy(dtype=np.float64)
+            if np.array_equal(values.astype(np.float32), values, equal_nan=True):
+                types[col] = np.float32
+    return df.astype(types)
+
+
+def read_only(df):
+    """Même DataFrame, sans copie, dont les tableaux ne sont plus modifiables en place.
+
+    Sous Copy-on-Write, to_numpy() rend une vue en lecture seule : le DataFrame reconstruit sur
+    ces vues (codes des catégories compris) lève une ValueError à toute écriture en place
+    (df.loc[...] = ..., fillna(inplace=True)...). Les chaînes Arrow restent telles quelles.
+    """
+    columns = {}
+    for col in df.columns:
+        s = df[col]
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            columns[col] = pd.Categorical.from_codes(s.cat.codes.to_numpy(), dtype=s.dtype)
+        elif isinstance(s.dtype, np.dtype):
+            columns[col] = s.to_numpy()
+        else:
+            columns[col] = s.array
+    return pd.DataFrame(columns, index=df.index, columns=df.columns, copy=False)
+
+
+def split_city_infos(df):
+    """Table des villes (une ligne par ville, index = ville) avec les colonnes de la fiche Wikipédia."""
+    columns = [c for c in CITY_INFO_COLUMNS if c in df.columns]
+    infos = df[["city"] + columns].dropna(subset=["city"])
+    # En mode incrémental, la dernière fiche écrite pour une ville est la plus récente
+    infos = infos.drop_duplicates("city", keep="last")
+    infos = infos.assign(city=np.asarray(infos["city"], dtype=object)).set_index("city").sort_index()
+    return infos.reindex(columns=CITY_INFO_COLUMNS)
+
+
+def join_city_infos(df, infos, order=None):
+    """Annonces avec les colonnes de la fiche ville, jointes à la demande sur la ville.
+
+    `order` : ordre de colonnes à retrouver (celui du fichier nettoyé), les autres à la suite.
+    """
+    joined = infos.reindex(np.asarray(df["city"], dtype=object)).set_axis(df.index)
+    out = pd.concat([df, joined], axis=1)
+    if order is not None:
+        known = [c for c in order if c in out.columns]
+        out = out[known + [c for c in out.columns if c not in known]]
+    return out
+
+
+def memory_report(frames):
+    """Mémoire occupée par colonne (octets, chaînes comprises) pour des tables nommées {nom: DataFrame}."""
+    rows = []
+    for name, frame in frames.items():
+        usage = frame.memory_usage(index=True, deep=True)
+        for col, size in usage.items():
+            rows.append({
+                "table": name,
+                "colonne": "(index)" if col == "Index" else col,
+                "type": str(frame.index.dtype if col == "Index" else frame[col].dtype),
+                "octets": int(size),
+            })
+    return pd.DataFrame(rows, columns=["table", "colonne", "type", "octets"])
@@ -0,0 +1,192 @@
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+from compact import CITY_INFO_COLUMNS, compact_listings, join_city_infos, read_only, split_city_infos
+from filter_index import FilterIndex
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "scripts"))
+from city_summary import finalize_summary, load_partials, summary_file  # noqa: E402
+from history import load_trends  # noqa: E402
+from metrics import load_latest  # noqa: E402
+from query_backend import DuckDBBackend, PandasBackend  # noqa: E402
+from scraper_ville_ideale import SCORE_COLUMNS  # noqa: E402
+
+DATA_CSV = "data/cleaned_data.csv"
+DATA_PARQUET = "data/cleaned_data.parquet"
+SCORES_PARQUET = "data/villes_scores.parquet"
+TRENDS_PARQUET = "data/historique_villes.parquet"
+METRICS_DIR = "data/metrics"
+
+# Moteur des filtres et agrégats : "pandas" (tout en mémoire) ou "duckdb" (requêtes sur le fichier)
+QUERY_BACKEND = os.environ.get("IMMO_QUERY_BACKEND", "pandas")
+
+# Colonnes lues par le tableau de bord (projection à la lecture du Parquet)
+APP_COLUMNS = [
+    "link", "price", "surface", "rooms", "DPE", "GES", "location", "reference",
+    "exterieur", "stationnement", "image", "postal_code", "city", "Population",
+    "Superficie", "Densité", "Infos_ville", "latitude", "longitude", "price_per_m2",
+    "is_complete", "removed",
+]
+
+# Copy-on-Write : un sous-ensemble filtré ou une colonne extraite est copié au moment où on le modifie,
+# pas avant ; le DataFrame partagé entre sessions est, lui, en lecture seule (voir _load et load_data)
+if int(pd.__version__.split(".")[0]) < 3:
+    pd.set_option("mode.copy_on_write", True)
+
+
+def data_source():
+    """Fichier à lire (Parquet typé si présent, sinon CSV) et sa version (mtime, taille)."""
+    path = DATA_PARQUET if os.path.exists(DATA_PARQUET) else DATA_CSV
+    stat = os.stat(path)
+    return path, (stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load(path, version):
+    if path == DATA_PARQUET:
+        # La fiche ville n'est pas lue ici : elle est chargée une fois par ville par _load_city_infos
+        available = set(pq.read_schema(path).names)
+        columns = [c for c in APP_COLUMNS if c in available and c not in CITY_INFO_COLUMNS]
+        df = pd.read_parquet(path, columns=columns, memory_map=True)
+    else:
+        df = pd.read_csv(path)
+
+    # Les annonces retirées du site restent dans l'historique mais ne sont pas affichées
+    if "removed" in df.columns:
+        df = df[~df["removed"]].reset_index(drop=True)
+    # Partagé entre sessions (et par l'index et le moteur de requête) : toute écriture en place lève une erreur
+    return read_only(compact_listings(df))
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_city_infos(path, version):
+    if path == DATA_PARQUET:
+        available = set(pq.read_schema(path).names)
+        columns = ["city"] + [c for c in CITY_INFO_COLUMNS if c in available]
+        # Lecture en dictionnaire : le texte répété sur chaque annonce n'est décodé qu'une fois
+        table = pq.read_table(path, columns=columns, read_dictionary=columns, memory_map=True)
+        df = table.to_pandas()
+    else:
+        df = pd.read_csv(path, usecols=lambda c: c == "city" or c in CITY_INFO_COLUMNS)
+    return split_city_infos(df)
+
+
+def data_version():
+    """Version courante des données (fichier, mtime, taille) : clé des caches de résultats."""
+    path, version = data_source()
+    return (path,) + version
+
+
+def load_data():
+    """DataFrame partagé (lecture seule) de la version courante des données, au format compact.
+
+    Rechargé uniquement quand le cleaner a écrit un nouveau fichier (mtime ou taille différents).
+    Les colonnes de la fiche ville n'y sont pas : voir load_city_infos / with_city_infos.
+    Chaque appel rend une copie superficielle : ajouter ou remplacer une colonne ne touche que
+    l'appelant, et une écriture dans les valeurs copie d'abord la colonne (Copy-on-Write).
+    """
+    return _load(*data_source()).copy(deep=False)
+
+
+def load_city_infos():
+    """Fiche Wikipédia par ville (index = ville) de la version courante des données."""
+    return _load_city_infos(*data_source())
+
+
+def with_city_infos(df):
+    """Annonces (sous-ensemble de load_data()) avec la fiche ville, dans l'ordre des colonnes du fichier."""
+    return join_city_infos(df, load_city_infos(), order=APP_COLUMNS)
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _build_index(path, version):
+    return FilterIndex(_load(path, version))
+
+
+def load_filter_index():
+    """Index des filtres de la version courante des données (aligné ligne à ligne sur load_data())."""
+    return _build_index(*data_source())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _backend(path, version):
+    if QUERY_BACKEND == "duckdb":
+        return DuckDBBackend((path,) + version, path, APP_COLUMNS)
+    return PandasBackend((path,) + version, _load(path, version), _build_index(path, version),
+                         _load_city_infos(path, version), load_city_summary, with_city_infos)
+
+
+def load_backend():
+    """Moteur de requête (IMMO_QUERY_BACKEND) sur la version courante des données, partagé entre sessions."""
+    return _backend(*data_source())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _memory_report(path, version):
+    return _backend(path, version).memory()
+
+
+def data_memory_report():
+    """Mémoire occupée par le moteur de requête : colonnes des tables en mémoire, ou tampons de DuckDB.
+
+    Le parcours des tables (memory_usage profond) n'est fait qu'une fois par version des données ;
+    les tampons de DuckDB, qui varient d'une requête à l'autre, sont relus à chaque appel.
+    """
+    if QUERY_BACKEND == "duckdb":
+        return load_backend().memory()
+    return _memory_report(*data_source())
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_summary(path, version):
+    return finalize_summary(load_partials(path))
+
+
+def load_city_summary():
+    """Synthèse par ville pré-calculée par le cleaner (None si elle n'existe pas encore)."""
+    if not os.path.exists(summary_file):
+        return None
+    stat = os.stat(summary_file)
+    return _load_summary(summary_file, (stat.st_mtime_ns, stat.st_size))
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_scores(path, version):
+    return pd.read_parquet(path)
+
+
+def load_city_scores():
+    """Notes Ville Idéale par ville (table vide si l'étape de notation n'a pas encore tourné)."""
+    if not os.path.exists(SCORES_PARQUET):
+        return pd.DataFrame({"city": pd.Series(dtype="str"), **{c: pd.Series(dtype="float64") for c in SCORE_COLUMNS}})
+    stat = os.stat(SCORES_PARQUET)
+    return _load_scores(SCORES_PARQUET, (stat.st_mtime_ns, stat.st_size))
+
+
+@st.cache_resource(max_entries=2, show_spinner=False)
+def _load_trends(path, version):
+    return load_trends(path)
+
+
+def load_price_trends():
+    """Prix par ville et par jour, depuis les seuls agrégats de l'historique (None avant le premier passage)."""
+    if not os.path.exists(TRENDS_PARQUET):
+        return None
+    stat = os.stat(TRENDS_PARQUET)
+    return _load_trends(TRENDS_PARQUET, (stat.st_mtime_ns, stat.st_size))
+
+
+def last_update():
+    """Date d'écriture du fichier de données courant."""
+    path, (mtime_ns, _) = data_source()
+    return datetime.fromtimestamp(mtime_ns / 1e9)
+
+
+def last_metrics():
+    """Mesures du dernier rafraîchissement (durées, HTTP, cache), ou None s'il n'y en a pas encore."""
+    return load_latest(METRICS_DIR)
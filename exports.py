@@ -0,0 +1,86 @@
+import hashlib
+import os
+import tempfile
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Fichiers d'export mis en cache sur disque, par version des données et état des filtres
+EXPORT_DIR = os.path.join(tempfile.gettempdir(), "immo_exports")
+MAX_EXPORTS = 8
+CHUNK_ROWS = 50_000
+
+FORMATS = {
+    "CSV": ("annonces_filtrees.csv", "text/csv"),
+    "Parquet": ("annonces_filtrees.parquet", "application/octet-stream"),
+}
+
+
+def _write_csv(df, path, prepare):
+    # Même contenu que df.to_csv(index=False).encode("utf-8-sig"), écrit par morceaux
+    with open(path, "w", encoding="utf-8-sig", newline="") as f:
+        for start in range(0, max(len(df), 1), CHUNK_ROWS):
+            prepare(df.iloc[start:start + CHUNK_ROWS]).to_csv(f, index=False, header=start == 0)
+
+
+def _write_parquet(df, path, prepare):
+    schema = pa.Schema.from_pandas(prepare(df.iloc[:0]), preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for start in range(0, len(df), CHUNK_ROWS):
+            chunk = prepare(df.iloc[start:start + CHUNK_ROWS])
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def export_file(df, version, filter_key, fmt, prepare=None):
+    """Contenu (octets) du fichier d'export du résultat filtré, construit à la première demande.
+
+    `df` peut être une fonction qui renvoie le DataFrame : il n'est alors lu que si le fichier
+    n'existe pas encore. `prepare(morceau)` complète chaque morceau avant écriture (fiche ville).
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    key = hashlib.blake2b(f"{version}|{filter_key}|{fmt}".encode(), digest_size=16).hexdigest()
+    path = os.path.join(EXPORT_DIR, f"{key}.{fmt.lower()}")
+    try:
+        with open(path, "rb") as f:
+            return f.read()
+    except FileNotFoundError:
+        pass  # absent, ou retiré par l'éviction d'une autre session : on le reconstruit
+
+    # Fichier temporaire propre à cet appel : plusieurs sessions peuvent construire le même export
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_DIR, suffix=".tmp")
+    os.close(fd)
+    try:
+        if callable(df):
+            df = df()
+        (_write_csv if fmt == "CSV" else _write_parquet)(df, tmp, prepare or (lambda chunk: chunk))
+        # Lu avant d'être publié : l'éviction ne peut pas le retirer entre l'écriture et la lecture
+        with open(tmp, "rb") as f:
+            data = f.read()
+        os.replace(tmp, path)
+    except BaseException:
+        _remove(tmp)
+        raise
+    _evict()
+    return data
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0  # retiré entre-temps par une autre session
+
+
+def _evict():
+    """Ne garde que les MAX_EXPORTS exports les plus récents."""
+    files = [os.path.join(EXPORT_DIR, f) for f in os.listdir(EXPORT_DIR) if not f.endswith(".tmp")]
+    files.sort(key=_mtime, reverse=True)
+    for old in files[MAX_EXPORTS:]:
+        _remove(old)
@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+
+RANGE_COLUMNS = ["price", "surface", "rooms"]
+BITMAP_COLUMNS = ["DPE", "GES", "exterieur", "stationnement"]
+POSTING_COLUMNS = ["city"]
+
+
+class FilterIndex:
+    """Index des filtres de la barre latérale, construit une fois par version des données.
+
+    - prix / surface / pièces : valeurs triées et numéros de lignes dans cet ordre (bornes par searchsorted) ;
+    - DPE, GES, extérieur, stationnement : un bitmap compressé (np.packbits) par valeur ;
+    - ville : liste des lignes de chaque ville (un bitmap par ville coûterait villes × lignes / 8 octets).
+
+    Les filtres se combinent par intersection de masques ; seul le résultat final est matérialisé.
+    """
+
+    def __init__(self, df):
+        self.n = len(df)
+        self.values = {}
+        self.sorted = {}
+        for col in RANGE_COLUMNS:
+            if col in df.columns:
+                values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+                order = np.argsort(values, kind="stable")  # NaN en dernier
+                self.values[col] = values
+                self.sorted[col] = (values[order], order)
+
+        self.categories = {}
+        self.bitmaps = {}
+        self.postings = {}
+        for col in BITMAP_COLUMNS + POSTING_COLUMNS:
+            if col not in df.columns:
+                continue
+            codes, labels = pd.factorize(np.asarray(df[col], dtype=object), sort=True)
+            self.categories[col] = (np.asarray(labels, dtype=object), codes, {v: i for i, v in enumerate(labels)})
+            if col in BITMAP_COLUMNS:
+                self.bitmaps[col] = [np.packbits(codes == i) for i in range(len(labels))]
+            else:
+                order = np.argsort(codes, kind="stable")  # NaN (code -1) en premier
+                offsets = np.searchsorted(codes[order], np.arange(len(labels) + 1))
+                self.postings[col] = (order, offsets)
+
+    def has(self, col):
+        return col in self.sorted or col in self.categories
+
+    def all_rows(self):
+        return np.ones(self.n, dtype=bool)
+
+    def rows(self, mask):
+        """Numéros des lignes retenues par un masque."""
+        return np.flatnonzero(mask)
+
+    def range_mask(self, col, low, high):
+        """Lignes dont la valeur est dans [low, high] (les valeurs manquantes sont exclues)."""
+        sorted_values, order = self.sorted[col]
+        start = np.searchsorted(sorted_values, low, side="left")
+        stop = np.searchsorted(sorted_values, high, side="right")
+        mask = np.zeros(self.n, dtype=bool)
+        mask[order[start:stop]] = True
+        return mask
+
+    def category_mask(self, col, selection):
+        """Lignes dont la valeur fait partie de la sélection."""
+        _, _, code_of = self.categories[col]
+        codes = [code_of[v] for v in selection if v in code_of]
+        if col in self.bitmaps:
+            bits = np.zeros((self.n + 7) // 8, dtype=np.uint8)
+            for code in codes:
+                bits |= self.bitmaps[col][code]
+            return np.unpackbits(bits, count=self.n).view(bool)
+        order, offsets = self.postings[col]
+        mask = np.zeros(self.n, dtype=bool)
+        for code in codes:
+            mask[order[offsets[code]:offsets[code + 1]]] = True
+        return mask
+
+    def bounds(self, col, mask):
+        """(min, max) des valeurs non manquantes parmi les lignes retenues, ou None."""
+        values = self.values[col][mask]
+        values = values[~np.isnan(values)]
+        if values.size == 0:
+            return None
+        return values.min(), values.max()
+
+    def options(self, col, mask):
+        """Valeurs présentes (triées) parmi les lignes retenues."""
+        labels, codes, _ = self.categories[col]
+        present = np.bincount(codes[mask] + 1, minlength=len(labels) + 1)[1:] > 0
+        return labels[present].tolist()
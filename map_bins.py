@@ -0,0 +1,70 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+# Au-delà de ce nombre d'annonces géolocalisées, la carte affiche des cellules agrégées
+MAP_POINT_THRESHOLD = 2000
+
+# Colonnes envoyées au navigateur en mode points (celles du tooltip)
+POINT_COLUMNS = ["city", "price", "surface", "price_per_m2", "DPE", "GES", "latitude", "longitude"]
+
+
+def fit_zoom(latitude, longitude):
+    """Zoom (web mercator) qui englobe tous les points, borné entre 3 et 14."""
+    span = max(np.ptp(longitude), np.ptp(latitude) * 1.5, 1e-3)
+    return int(min(14, max(3, math.floor(math.log2(360 / span)))))
+
+
+def point_table(df):
+    """Annonces individuelles, réduites aux colonnes du tooltip et prêtes à afficher."""
+    df_map = df[[c for c in POINT_COLUMNS if c in df.columns]].dropna(subset=["latitude", "longitude"])
+    for col in ["price", "surface", "price_per_m2", "DPE", "GES"]:
+        if col not in df_map.columns:
+            df_map[col] = None
+
+    # Conversion des colonnes pour éviter les NaN dans le tooltip
+    price_per_m2 = df_map["price_per_m2"].to_numpy(dtype=float)
+    return df_map.assign(
+        price=df_map["price"].fillna(0).astype(int),
+        surface=df_map["surface"].fillna(0).astype(float),
+        price_per_m2=np.nan_to_num(price_per_m2, nan=0.0),
+        price_per_m2_fmt=np.char.mod("%.2f", price_per_m2),
+    )
+
+
+def cell_size(zoom):
+    """Côté (degrés) des cellules d'agrégation à ce zoom : environ 16 cellules sur la largeur de la vue."""
+    return 360 / 2 ** zoom / 16
+
+
+def grid_bins(df, zoom):
+    """Regroupe les annonces en cellules carrées dont la taille suit le zoom.
+
+    Chaque cellule porte le nombre d'annonces, le prix/m² médian, un rayon (m) et une teinte.
+    """
+    points = df[["latitude", "longitude", "price_per_m2"]].dropna(subset=["latitude", "longitude"])
+    cell = cell_size(zoom)
+    points = points.assign(
+        ix=np.floor(points["longitude"].to_numpy() / cell).astype(np.int64),
+        iy=np.floor(points["latitude"].to_numpy() / cell).astype(np.int64),
+    )
+    bins = (
+        points.groupby(["ix", "iy"])["price_per_m2"]
+        .agg(count="size", median_price_per_m2="median")
+        .reset_index()
+    )
+    return bin_layout(bins, cell)
+
+
+def bin_layout(bins, cell):
+    """Position, rayon et teinte des cellules (ix, iy, count, median_price_per_m2), triées par (ix, iy)."""
+    bins["longitude"] = (bins["ix"] + 0.5) * cell
+    bins["latitude"] = (bins["iy"] + 0.5) * cell
+
+    # Bulle inscrite dans la cellule, plus grande quand la cellule contient plus d'annonces
+    half_cell_m = cell * 111_320 / 2 * np.cos(np.radians(bins["latitude"]))
+    bins["radius"] = half_cell_m * (0.3 + 0.7 * np.sqrt(bins["count"] / bins["count"].max()))
+    bins["color_t"] = bins["median_price_per_m2"].rank(pct=True).fillna(0)
+    bins["median_fmt"] = np.char.mod("%.0f", bins["median_price_per_m2"].fillna(0).to_numpy())
+    return bins.drop(columns=["ix", "iy"])
@@ -0,0 +1,261 @@
+"""Moteurs de requête du tableau de bord : les filtres, indicateurs et synthèses passent par eux.
+
+Les filtres sont un tuple de conditions (colonne, opérateur, valeur), dans l'ordre de la barre latérale :
+- ("city", "in", ("Lyon", "Lille")) : valeur parmi une sélection ;
+- ("price", "between", (100000, 250000)) : valeur dans l'intervalle, bornes comprises.
+Les valeurs manquantes ne satisfont aucune condition. Le tuple sert aussi de clé aux caches de résultats.
+
+- PandasBackend : DataFrame compact en mémoire et index des filtres (FilterIndex) ;
+- DuckDBBackend : requêtes SQL sur le fichier nettoyé (Parquet ou CSV) avec DuckDB embarqué ;
+  seules les lignes de résultat (options, agrégats, page affichée) sont chargées en mémoire.
+"""
+import numpy as np
+import pandas as pd
+import duckdb
+
+from city_summary import city_partials, finalize_summary
+from compact import CITY_INFO_COLUMNS, memory_report
+from map_bins import POINT_COLUMNS, bin_layout, cell_size, grid_bins, point_table
+from result_cache import ResultCache, results
+
+SUMMARY_COLUMNS = ["city", "prix_moyen", "surface_moyenne", "nb_annonces", "dpe_moyen"]
+
+
+class PandasBackend:
+    """Filtres sur l'index en mémoire ; masques des préfixes de filtres réutilisés d'un widget à l'autre."""
+
+    name = "pandas"
+
+    def __init__(self, version, df, index, city_infos, city_summary, prepare):
+        self.version = version            # version des données chargées : clé des caches de résultats
+        self.df = df
+        self.index = index
+        self.city_infos = city_infos      # table des villes (index = ville)
+        self.city_summary = city_summary  # fonction : synthèse pré-calculée par le pipeline, ou None
+        self.prepare = prepare            # fonction : ajoute la fiche ville à des annonces
+        self._masks = ResultCache(max_entries=64)
+
+    def has(self, col):
+        return col in self.df.columns
+
+    def _condition_mask(self, condition):
+        col, op, value = condition
+        if op == "in":
+            return self.index.category_mask(col, value)
+        return self.index.range_mask(col, *value)
+
+    def mask(self, filters):
+        """Masque des lignes retenues (partagé : ne pas modifier)."""
+        if not filters:
+            return self.index.all_rows()
+        return self._masks.get("masque", filters, lambda: self.mask(filters[:-1]) & self._condition_mask(filters[-1]))
+
+    def rows(self, filters):
+        return results.get("lignes", (self.version, filters), lambda: self.index.rows(self.mask(filters)))
+
+    def frame(self, filters):
+        return self.df.iloc[self.rows(filters)]
+
+    def options(self, col, filters):
+        return self.index.options(col, self.mask(filters))
+
+    def bounds(self, col, filters):
+        return self.index.bounds(col, self.mask(filters))
+
+    def summarize(self, filters):
+        """Indicateurs clés, villes présentes et synthèse par ville des annonces retenues."""
+        sub = self.frame(filters)
+        villes = sub["city"].dropna().unique().tolist()
+
+        # Filtre par ville uniquement : lecture de la synthèse du pipeline ; sinon agrégation du seul sous-ensemble filtré
+        city_summary = self.city_summary()
+        city_filters = tuple(c for c in filters if c[0] == "city")
+        if city_summary is not None and np.array_equal(self.mask(filters), self.mask(city_filters)):
+            summary = city_summary[city_summary["city"].isin(villes)].reset_index(drop=True)
+        else:
+            summary = finalize_summary(city_partials(sub))
+
+        return {
+            "kpis": {
+                "prix_moyen": sub["price"].mean() if not sub.empty else None,
+                "surface_moyenne": sub["surface"].mean() if not sub.empty else None,
+                "nombre": len(sub),
+            },
+            "villes": villes,
+            "summary": summary,
+        }
+
+    def page(self, filters, start, size):
+        """Annonces [start, start + size) du résultat, avec la fiche ville."""
+        return self.prepare(self.frame(filters).iloc[start:start + size])
+
+    def ville_infos(self, ville):
+        return self.city_infos.loc[ville]
+
+    def map_extent(self, filters):
+        coords = self.frame(filters)[["latitude", "longitude"]].dropna()
+        if coords.empty:
+            return None
+        lat, lon = coords["latitude"].to_numpy(dtype=float), coords["longitude"].to_numpy(dtype=float)
+        return {"count": len(coords), "latitude": (lat.min(), lat.max(), lat.mean()),
+                "longitude": (lon.min(), lon.max(), lon.mean())}
+
+    def map_points(self, filters):
+        return point_table(self.frame(filters))
+
+    def map_bins(self, filters, zoom):
+        return grid_bins(self.frame(filters), zoom)
+
+    def memory(self):
+        return memory_report({"annonces": self.df, "villes": self.city_infos})
+
+
+def _quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+
+def where_clause(filters):
+    """Clause WHERE et paramètres SQL d'un tuple de conditions."""
+    parts, params = [], []
+    for col, op, value in filters:
+        if op == "in":
+            if not value:
+                parts.append("FALSE")
+                continue
+            parts.append(f"{_quote(col)} IN ({', '.join('?' * len(value))})")
+            params.extend(value)
+        else:
+            parts.append(f"{_quote(col)} BETWEEN ? AND ?")
+            params.extend(value)
+    return " AND ".join(parts) or "TRUE", params
+
+
+class DuckDBBackend:
+    """Requêtes sur le fichier nettoyé, lu par DuckDB au moment de la requête (rien n'est chargé à l'avance).
+
+    Une connexion par processus ; chaque requête passe par son propre curseur (sûr entre threads).
+    """
+
+    name = "duckdb"
+
+    def __init__(self, version, path, columns):
+        self.version = version  # version des données à l'ouverture : clé des caches de résultats
+        self.con = duckdb.connect()
+        quoted = path.replace(chr(39), chr(39) * 2)
+        if path.endswith(".parquet"):
+            scan = f"read_parquet('{quoted}', file_row_number = true)"
+            ligne = "file_row_number"
+        else:
+            # Pas de numéro de ligne pour le CSV : row_number() sans ORDER BY suit l'ordre de lecture
+            # (ordre d'insertion préservé par DuckDB)
+            scan = f"read_csv_auto('{quoted}')"
+            ligne = "row_number() OVER ()"
+        available = [c[0] for c in self.con.execute(f"DESCRIBE SELECT * FROM {scan}").fetchall()]
+        self.columns = [c for c in columns if c in available]
+        self._select = ", ".join(map(_quote, self.columns))
+        # _ligne : position dans le fichier, pour des pages et une fiche ville dans le même ordre qu'avec pandas
+        self.con.execute(f"CREATE VIEW fichier AS SELECT {self._select}, {ligne} AS _ligne FROM {scan}")
+        # Les annonces retirées du site restent dans l'historique mais ne sont pas affichées
+        removed = "WHERE NOT removed" if "removed" in available else ""
+        self.con.execute(f"CREATE VIEW annonces AS SELECT * FROM fichier {removed}")
+        self.prepare = None  # la fiche ville est lue avec les annonces
+
+    def _query(self, sql, params=()):
+        with self.con.cursor() as cur:
+            return cur.execute(sql, params).df()
+
+    def _one(self, sql, params=()):
+        with self.con.cursor() as cur:
+            return cur.execute(sql, params).fetchone()
+
+    def has(self, col):
+        return col in self.columns
+
+    def options(self, col, filters):
+        where, params = where_clause(filters)
+        q = _quote(col)
+        return self._query(f"SELECT DISTINCT {q} AS v FROM annonces WHERE {where} AND {q} IS NOT NULL ORDER BY v",
+                           params)["v"].tolist()
+
+    def bounds(self, col, filters):
+        where, params = where_clause(filters)
+        low, high = self._one(f"SELECT min({_quote(col)}), max({_quote(col)}) FROM annonces WHERE {where}", params)
+        return None if low is None else (low, high)
+
+    def summarize(self, filters):
+        where, params = where_clause(filters)
+        prix, surface, nombre = self._one(
+            f"SELECT avg(price), avg(surface), count(*) FROM annonces WHERE {where}", params)
+        villes = self._query(
+            f"SELECT DISTINCT city FROM annonces WHERE {where} AND city IS NOT NULL ORDER BY city", params)
+        # Même définition que city_summary.finalize_summary ; DPE le plus fréquent, le premier par ordre alphabétique
+        # en cas d'égalité (idxmax sur les colonnes dpe_* triées)
+        summary = self._query(f"""
+            WITH f AS (SELECT * FROM annonces WHERE {where} AND city IS NOT NULL),
+            stats AS (
+                SELECT city, avg(price) AS prix_moyen, avg(surface) AS surface_moyenne,
+                       count(reference) AS nb_annonces
+                FROM f GROUP BY city
+            ),
+            dpe AS (
+                SELECT city, "DPE" AS dpe_moyen FROM f WHERE "DPE" IS NOT NULL GROUP BY city, "DPE"
+                QUALIFY row_number() OVER (PARTITION BY city ORDER BY count(*) DESC, "DPE") = 1
+            )
+            SELECT {', '.join(SUMMARY_COLUMNS)} FROM stats LEFT JOIN dpe USING (city) ORDER BY city
+        """, params)
+        return {
+            "kpis": {"prix_moyen": prix, "surface_moyenne": surface, "nombre": nombre},
+            "villes": villes["city"].tolist(),
+            "summary": summary,
+        }
+
+    def frame(self, filters):
+        where, params = where_clause(filters)
+        return self._query(f"SELECT {self._select} FROM annonces WHERE {where} ORDER BY _ligne", params)
+
+    def page(self, filters, start, size):
+        where, params = where_clause(filters)
+        return self._query(f"SELECT {self._select} FROM annonces WHERE {where} ORDER BY _ligne LIMIT ? OFFSET ?",
+                           params + [size, start])
+
+    def ville_infos(self, ville):
+        """Fiche de la dernière annonce de la ville dans le fichier, retirées comprises (comme split_city_infos)."""
+        columns = [c for c in CITY_INFO_COLUMNS if c in self.columns]
+        row = self._one(f"SELECT {', '.join(map(_quote, columns))} FROM fichier WHERE city = ? "
+                        "ORDER BY _ligne DESC LIMIT 1", [ville]) if columns else None
+        return pd.Series(dict(zip(columns, row or ())), index=CITY_INFO_COLUMNS, dtype=object)
+
+    def map_extent(self, filters):
+        where, params = where_clause(filters)
+        count, *stats = self._one(f"""
+            SELECT count(*), min(latitude), max(latitude), avg(latitude), min(longitude), max(longitude), avg(longitude)
+            FROM annonces WHERE {where} AND latitude IS NOT NULL AND longitude IS NOT NULL
+        """, params)
+        if count == 0:
+            return None
+        return {"count": count, "latitude": tuple(stats[:3]), "longitude": tuple(stats[3:])}
+
+    def map_points(self, filters):
+        where, params = where_clause(filters)
+        columns = ", ".join(_quote(c) for c in POINT_COLUMNS if c in self.columns)
+        return point_table(self._query(
+            f"SELECT {columns} FROM annonces WHERE {where} AND latitude IS NOT NULL AND longitude IS NOT NULL", params))
+
+    def map_bins(self, filters, zoom):
+        """Cellules agrégées par DuckDB : seule une ligne par cellule revient en mémoire."""
+        where, params = where_clause(filters)
+        cell = cell_size(zoom)
+        bins = self._query(f"""
+            SELECT CAST(floor(longitude / ?) AS BIGINT) AS ix, CAST(floor(latitude / ?) AS BIGINT) AS iy,
+                   count(*) AS count, median(price_per_m2) AS median_price_per_m2
+            FROM annonces WHERE {where} AND latitude IS NOT NULL AND longitude IS NOT NULL
+            GROUP BY ix, iy ORDER BY ix, iy
+        """, [cell, cell] + params)
+        return bin_layout(bins, cell)
+
+    def memory(self):
+        """Mémoire tenue par DuckDB (tampons, tables de hachage...), par catégorie."""
+        usage = self._query("SELECT tag, memory_usage_bytes FROM duckdb_memory() WHERE memory_usage_bytes > 0")
+        return pd.DataFrame({"table": "duckdb", "colonne": usage["tag"], "type": "",
+                             "octets": usage["memory_usage_bytes"].astype(int)},
+                            columns=["table", "colonne", "type", "octets"])
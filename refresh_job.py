@@ -0,0 +1,176 @@
+import os
+import shutil
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.append(os.path.join(ROOT, "scripts"))
+
+import history
+import pipeline
+import scraper_annonces
+
+DATA_DIR = os.path.join(ROOT, "data")
+STAGING_DIR = os.path.join(DATA_DIR, ".refresh")
+STAGING_DATA_DIR = os.path.join(STAGING_DIR, "data")
+LOCK_FILE = os.path.join(DATA_DIR, "refresh.lock")
+METRICS_DIR = os.path.join(DATA_DIR, "metrics")  # hors du dossier de travail : gardé même en cas d'échec
+# Point de reprise du crawl : ramené dans data/ si le rafraîchissement échoue, pour repartir de là au suivant
+REPRISE_DIR = os.path.join(DATA_DIR, scraper_annonces.REPRISE_DIR)
+LOCK_STALE_AFTER = 6 * 3600  # un verrou plus vieux vient d'un processus mort
+
+# Fichiers produits par le pipeline ; remplacés à la fin, le Parquet principal puis l'état des étapes en dernier
+DATA_FILES = [
+    "raw_data.csv",
+    "liens_actifs.csv",
+    scraper_annonces.LIENS_VUS,
+    "villes_summary.parquet",
+    "villes_scores.parquet",
+    history.ROLLUP_FILE,
+    "cleaned_data.csv",
+    "cleaned_data.parquet",
+    pipeline.STATE_FILE,
+]
+
+
+def _acquire_file_lock():
+    """Verrou inter-processus : un seul rafraîchissement à la fois, même avec plusieurs serveurs."""
+    try:
+        if time.time() - os.path.getmtime(LOCK_FILE) > LOCK_STALE_AFTER:
+            os.remove(LOCK_FILE)
+    except OSError:
+        pass
+    try:
+        fd = os.open(LOCK_FILE, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+    except FileExistsError:
+        return False
+    with os.fdopen(fd, "w") as f:
+        f.write(str(os.getpid()))
+    return True
+
+
+def _release_file_lock():
+    try:
+        os.remove(LOCK_FILE)
+    except OSError:
+        pass
+
+
+class RefreshJob:
+    """Rafraîchissement des données en arrière-plan, partagé par toutes les sessions du serveur.
+
+    Le pipeline tourne dans ce processus, dans un dossier de travail ; les nouveaux fichiers
+    ne remplacent ceux de data/ qu'une fois toutes les étapes terminées.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self.state = "idle"  # idle | running | done | error | cancelled
+        self.stages = []
+        self.message = ""
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def running(self):
+        return self.state == "running"
+
+    def start(self, force=False):
+        """Lance le rafraîchissement ; False si un autre est déjà en cours."""
+        with self._lock:
+            if self.running or not _acquire_file_lock():
+                return False
+            self._cancel.clear()
+            self.state = "running"
+            self.message = ""
+            self.stages = [
+                {"key": stage["name"], "name": stage["label"], "status": "pending", "last_line": ""}
+                for stage in pipeline.toposort(pipeline.STAGES)
+            ]
+            self.started_at = time.time()
+            self.finished_at = None
+        threading.Thread(target=self._run, args=(force,), name="refresh-job", daemon=True).start()
+        return True
+
+    def cancel(self):
+        self._cancel.set()
+
+    def snapshot(self):
+        """Copie cohérente de l'état, pour l'affichage."""
+        with self._lock:
+            return {
+                "state": self.state,
+                "message": self.message,
+                "stages": [dict(stage) for stage in self.stages],
+                "started_at": self.started_at,
+                "finished_at": self.finished_at,
+            }
+
+    def _set(self, **kwargs):
+        with self._lock:
+            for key, value in kwargs.items():
+                setattr(self, key, value)
+
+    def _on_progress(self, key, status, message):
+        with self._lock:
+            for stage in self.stages:
+                if stage["key"] == key:
+                    stage.update(status=status, last_line=message)
+
+    def _run(self, force):
+        try:
+            # Rien à relancer : on s'épargne la copie des données dans le dossier de travail
+            todo = dict(pipeline.plan(DATA_DIR, force))
+            if not todo:
+                for stage in self.stages:
+                    self._on_progress(stage["key"], "skipped", "ignorée : entrées inchangées")
+                self._set(state="done", message="✅ Données déjà à jour.")
+                return
+            self._prepare_staging()
+            pipeline.run_pipeline(STAGING_DATA_DIR, force=force, on_progress=self._on_progress,
+                                  cancel=self._cancel, metrics_dir=METRICS_DIR)
+            self._swap()
+            self._set(state="done", message="✅ Données mises à jour avec succès !")
+        except InterruptedError:
+            self._set(state="cancelled", message="⏹️ Actualisation annulée, données inchangées.")
+        except Exception as e:
+            self._set(state="error", message=f"❌ Erreur lors de la mise à jour : {e}")
+        finally:
+            reprise = os.path.join(STAGING_DATA_DIR, scraper_annonces.REPRISE_DIR)
+            if os.path.isdir(reprise):
+                shutil.rmtree(REPRISE_DIR, ignore_errors=True)
+                os.replace(reprise, REPRISE_DIR)
+            shutil.rmtree(STAGING_DIR, ignore_errors=True)
+            _release_file_lock()
+            self._set(finished_at=time.time())
+
+    def _prepare_staging(self):
+        """Dossier de travail initialisé avec les données actuelles (utiles au mode incrémental)."""
+        shutil.rmtree(STAGING_DIR, ignore_errors=True)
+        os.makedirs(STAGING_DATA_DIR)
+        for name in DATA_FILES:
+            src = os.path.join(DATA_DIR, name)
+            if os.path.exists(src):
+                shutil.copy2(src, os.path.join(STAGING_DATA_DIR, name))
+        if os.path.isdir(REPRISE_DIR):
+            os.replace(REPRISE_DIR, os.path.join(STAGING_DATA_DIR, scraper_annonces.REPRISE_DIR))
+
+    def _swap(self):
+        # Fichiers d'historique de ce passage : ajoutés aux partitions existantes (jamais copiées)
+        staged_history = os.path.join(STAGING_DATA_DIR, history.HISTORY_DIR)
+        if os.path.isdir(staged_history):
+            for partition in os.listdir(staged_history):
+                target = os.path.join(DATA_DIR, history.HISTORY_DIR, partition)
+                os.makedirs(target, exist_ok=True)
+                for name in os.listdir(os.path.join(staged_history, partition)):
+                    os.replace(os.path.join(staged_history, partition, name), os.path.join(target, name))
+        for name in DATA_FILES:
+            src = os.path.join(STAGING_DATA_DIR, name)
+            if os.path.exists(src):
+                os.replace(src, os.path.join(DATA_DIR, name))
+
+
+# Un seul job par processus serveur, visible de toutes les sessions
+job = RefreshJob()
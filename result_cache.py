@@ -0,0 +1,101 @@
+import os
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+# Bornes du cache de résultats partagé par toutes les sessions du processus Streamlit
+MAX_ENTRIES = int(os.environ.get("IMMO_RESULTS_MAX", "256"))
+MAX_BYTES = int(os.environ.get("IMMO_RESULTS_MB", "256")) * 1024 * 1024
+
+
+def size_of(value):
+    """Taille approximative (octets) d'un résultat : tableaux, DataFrames et conteneurs de ceux-ci."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(index=True, deep=True))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(size_of(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(size_of(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Résultats calculés pour un état des filtres, partagés entre sessions (LRU borné en entrées et en mémoire).
+
+    La clé contient la version des données : un nouveau fichier rend les anciennes entrées
+    inaccessibles, l'éviction les retire ensuite. Les valeurs sont partagées telles quelles
+    et ne doivent pas être modifiées par les sessions.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, max_bytes=MAX_BYTES):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # clé -> (valeur, taille)
+        self.bytes = 0
+        self.hits = {}
+        self.misses = {}
+        self.evictions = 0
+
+    def get(self, kind, key, compute):
+        """Valeur de (kind, key), calculée par `compute()` au premier appel.
+
+        Le calcul se fait hors du verrou : deux sessions qui demandent en même temps
+        un résultat absent le calculent chacune, la seconde écriture est ignorée.
+        """
+        full_key = (kind,) + tuple(key)
+        with self._lock:
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                self._entries.move_to_end(full_key)
+                self.hits[kind] = self.hits.get(kind, 0) + 1
+                return entry[0]
+            self.misses[kind] = self.misses.get(kind, 0) + 1
+
+        value = compute()
+        size = size_of(value)
+        if size > self.max_bytes:
+            return value  # trop gros pour être gardé
+        with self._lock:
+            if full_key not in self._entries:
+                self._entries[full_key] = (value, size)
+                self.bytes += size
+                self._evict()
+        return value
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self.bytes > self.max_bytes):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.bytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        """Taux de succès global et par type de résultat, occupation du cache."""
+        with self._lock:
+            hits, misses = sum(self.hits.values()), sum(self.misses.values())
+            return {
+                "entries": len(self._entries),
+                "bytes": self.bytes,
+                "evictions": self.evictions,
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else None,
+                "kinds": {kind: {"hits": self.hits.get(kind, 0), "misses": self.misses.get(kind, 0)}
+                          for kind in sorted(set(self.hits) | set(self.misses))},
+            }
+
+
+# Instance unique du processus : le module n'est importé qu'une fois, quelle que soit la session
+results = ResultCache()
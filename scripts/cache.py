@@ -0,0 +1,196 @@
+import atexit
+import functools
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Cache disque partagé entre les scripts (survit aux relances via subprocess), dans data/ à la racine
+# du projet quel que soit le dossier de lancement
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_FILE = os.environ.get("IMMO_CACHE_FILE", os.path.join(ROOT_DIR, "data", "cache.sqlite"))
+MAX_ENTRIES = int(os.environ.get("IMMO_CACHE_MAX", "100000"))
+# Éviction tous les EVICT_EVERY ajouts (le cache peut dépasser MAX_ENTRIES d'autant entre deux passages)
+EVICT_EVERY = int(os.environ.get("IMMO_CACHE_EVICT_EVERY", "1000"))
+# Dates de lecture (LRU) gardées en mémoire et écrites par lots de cette taille
+TOUCH_BATCH = 1000
+SQL_CHUNK = 500  # clés par requête IN (...)
+
+# Durée de validité par source, en secondes (None = jamais expiré)
+TTLS = {
+    "wikipedia": 180 * 24 * 3600,   # population, superficie : quasi immuables
+    "ville_ideale": 30 * 24 * 3600,  # notes qui évoluent avec les avis
+    "geocodage": None,               # un code postal ne se déplace pas
+}
+
+
+class PersistentCache:
+    """Cache clé/valeur SQLite avec TTL par source, éviction LRU et compteurs.
+
+    Les lectures ne font pas d'écriture : leur date (pour le LRU) est notée en mémoire et écrite
+    par lots, avec le prochain ajout ou à la sortie du processus. get_many / set_many traitent
+    des milliers de clés en une seule transaction.
+    """
+
+    def __init__(self, path=CACHE_FILE, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = {}
+        self.misses = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._touched = {}        # (source, clé) -> date de dernière lecture, pas encore écrite
+        self._since_evict = 0     # ajouts depuis la dernière éviction
+        atexit.register(self._flush_at_exit)
+
+    def _connect(self):
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30)
+            # Journal WAL : un commit ne force plus l'écriture de toute la base sur disque
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " source TEXT, key TEXT, value TEXT, created_at REAL, accessed_at REAL,"
+                " PRIMARY KEY (source, key))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON cache(accessed_at)")
+            self._conn.commit()
+        return self._conn
+
+    def get(self, source, key):
+        """Retourne (trouvé, valeur) ; une entrée expirée compte comme absente."""
+        found = self.get_many(source, [key])
+        return (True, found[key]) if key in found else (False, None)
+
+    def get_many(self, source, keys):
+        """Valeurs trouvées (et non expirées) pour `keys`, en un dictionnaire clé -> valeur."""
+        keys = list(dict.fromkeys(keys))
+        found = {}
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            ttl = TTLS.get(source)
+            for start in range(0, len(keys), SQL_CHUNK):
+                chunk = keys[start:start + SQL_CHUNK]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT key, value, created_at FROM cache WHERE source = ? AND key IN ({placeholders})",
+                    [source] + chunk,
+                ).fetchall()
+                for key, value, created_at in rows:
+                    if ttl is None or now - created_at <= ttl:
+                        found[key] = json.loads(value)
+                        self._touched[(source, key)] = now
+            self.hits[source] = self.hits.get(source, 0) + len(found)
+            self.misses[source] = self.misses.get(source, 0) + len(keys) - len(found)
+            if len(self._touched) >= TOUCH_BATCH:
+                self._flush_touched(conn)
+                conn.commit()
+        return found
+
+    def set(self, source, key, value):
+        self.set_many(source, [(key, value)])
+
+    def set_many(self, source, items):
+        """Ajoute ou remplace des couples (clé, valeur) en une seule transaction."""
+        with self._lock:
+            conn = self._connect()
+            now = time.time()
+            rows = [(source, key, json.dumps(value, ensure_ascii=False), now, now) for key, value in items]
+            conn.executemany("INSERT OR REPLACE INTO cache VALUES (?, ?, ?, ?, ?)", rows)
+            self._flush_touched(conn)
+            self._since_evict += len(rows)
+            if self._since_evict >= EVICT_EVERY:
+                self._evict(conn)
+            conn.commit()
+
+    def _flush_touched(self, conn):
+        if self._touched:
+            conn.executemany("UPDATE cache SET accessed_at = ? WHERE source = ? AND key = ?",
+                             [(at, source, key) for (source, key), at in self._touched.items()])
+            self._touched.clear()
+
+    def _evict(self, conn):
+        """Éviction des entrées les moins récemment lues au-delà de la taille max."""
+        excess = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0] - self.max_entries
+        if excess > 0:
+            conn.execute(
+                "DELETE FROM cache WHERE rowid IN "
+                "(SELECT rowid FROM cache ORDER BY accessed_at LIMIT ?)", (excess,)
+            )
+        self._since_evict = 0
+
+    def flush(self):
+        """Écrit les dates de lecture en attente et applique l'éviction."""
+        with self._lock:
+            if self._conn is None:
+                return
+            self._flush_touched(self._conn)
+            self._evict(self._conn)
+            self._conn.commit()
+
+    def _flush_at_exit(self):
+        try:
+            self.flush()
+        except sqlite3.Error:
+            pass  # base supprimée ou verrouillée : seules des dates de lecture sont perdues
+
+    def invalidate(self, source=None):
+        """Vide tout le cache, ou seulement une source."""
+        with self._lock:
+            conn = self._connect()
+            if source is None:
+                conn.execute("DELETE FROM cache")
+            else:
+                conn.execute("DELETE FROM cache WHERE source = ?", (source,))
+            conn.commit()
+
+    def stats(self):
+        """Compteurs de hits / misses par source pour ce processus."""
+        sources = sorted(set(self.hits) | set(self.misses))
+        return {
+            s: {"hits": self.hits.get(s, 0), "misses": self.misses.get(s, 0)}
+            for s in sources
+        }
+
+
+cache = PersistentCache()
+
+
+def make_key(args):
+    """Clé de cache d'un appel : arguments sérialisés en JSON."""
+    return json.dumps(args, ensure_ascii=False, default=str)
+
+
+def persistent_cache(source, is_valid=None):
+    """Décorateur : mémorise le résultat (JSON) d'une fonction dans le cache disque.
+
+    `is_valid` permet de ne pas figer un échec réseau pendant toute la durée du TTL.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args):
+            key = make_key(args)
+            found, value = cache.get(source, key)
+            if found:
+                return value
+            value = func(*args)
+            if is_valid is None or is_valid(value):
+                cache.set(source, key, value)
+            return value
+        return wrapper
+    return decorator
+
+
+if __name__ == "__main__":
+    # python scripts/cache.py clear [source]
+    if len(sys.argv) >= 2 and sys.argv[1] == "clear":
+        source = sys.argv[2] if len(sys.argv) > 2 else None
+        cache.invalidate(source)
+        print(f"🧹 Cache vidé ({source or 'toutes les sources'})")
+    else:
+        print("Usage : python scripts/cache.py clear [wikipedia|ville_ideale|geocodage]")
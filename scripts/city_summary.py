@@ -0,0 +1,62 @@
+import os
+
+import pandas as pd
+
+summary_file = "data/villes_summary.parquet"
+
+
+def city_partials(df):
+    """Agrégats additifs par ville (comptages et sommes) : se mettent à jour par addition / soustraction."""
+    if df.empty:
+        return pd.DataFrame(columns=["nb_lignes", "nb_annonces", "price_sum", "price_count",
+                                     "surface_sum", "surface_count"], dtype=float)
+    grouped = df.groupby("city", observed=True)
+    partials = pd.DataFrame({
+        "nb_lignes": grouped.size(),
+        "nb_annonces": grouped["reference"].count(),
+        "price_sum": grouped["price"].sum(),
+        "price_count": grouped["price"].count(),
+        "surface_sum": grouped["surface"].sum(),
+        "surface_count": grouped["surface"].count(),
+    })
+    # Répartition des classes DPE, pour retrouver la classe la plus fréquente sans lambda par groupe
+    dpe = df.groupby(["city", "DPE"], observed=True).size().unstack(fill_value=0)
+    dpe.columns = [f"dpe_{c}" for c in dpe.columns]
+    return partials.join(dpe).fillna(0).astype(float)
+
+
+def update_partials(partials, added, dropped):
+    """Applique les annonces apparues / disparues à des agrégats existants."""
+    result = partials.add(city_partials(added), fill_value=0).sub(city_partials(dropped), fill_value=0)
+    result = result.fillna(0)
+    return result[result["nb_lignes"] > 0].sort_index()
+
+
+def finalize_summary(partials):
+    """Tableau de synthèse par ville tel qu'affiché dans le tableau de bord."""
+    partials = partials.sort_index()
+    dpe_cols = sorted(c for c in partials.columns if c.startswith("dpe_"))
+    dpe_counts = partials[dpe_cols]
+    if dpe_cols:
+        # idxmax prend la première classe ex aequo, comme mode().iloc[0]
+        dpe_moyen = dpe_counts.idxmax(axis=1).str[len("dpe_"):].where(dpe_counts.sum(axis=1) > 0, None)
+    else:
+        dpe_moyen = pd.Series(None, index=partials.index, dtype=object)
+    summary = pd.DataFrame({
+        "prix_moyen": partials["price_sum"] / partials["price_count"],
+        "surface_moyenne": partials["surface_sum"] / partials["surface_count"],
+        "nb_annonces": partials["nb_annonces"].astype(int),
+        "dpe_moyen": dpe_moyen,
+    })
+    summary.index.name = "city"
+    return summary.reset_index()
+
+
+def save_partials(partials, path=summary_file):
+    tmp = path + ".tmp"
+    partials.rename_axis("city").reset_index().to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def load_partials(path=summary_file):
+    return pd.read_parquet(path).set_index("city")
@@ -1,44 +1,36 @@
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import io
 import re
 import os
-import requests
-import time
-from functools import lru_cache
-from scraper_wiki import get_ville_infos
-from tqdm import tqdm
-
-# Dossier data
-raw_file = "data/raw_data.csv"
-clean_file = "data/cleaned_data.csv"
-
-# Vérifie si le fichier existe
-if not os.path.exists(raw_file):
-    raise FileNotFoundError(f"❌ Le fichier {raw_file} est introuvable. Lance d'abord scraper.py")
-
-df = pd.read_csv(raw_file)
-print(f"📊 Lignes brutes importées : {len(df)}")
-
-# --- Nettoyage prix ---
-if "price" in df.columns:
-    df["price"] = (
-        df["price"].astype(str)
-        .str.replace("€", "", regex=False)
-        .str.replace(" ", "", regex=False)
-        .str.replace("\xa0", "", regex=False)
-        .str.strip()
-    )
-    df["price"] = pd.to_numeric(df["price"], errors="coerce")
-
-# --- Nettoyage surface ---
-if "surface" in df.columns:
-    df["surface"] = (
-        df["surface"].astype(str)
-        .str.replace("m²", "", regex=False)
-        .str.replace(" ", "", regex=False)
-        .str.replace("\xa0", "", regex=False)
-        .str.strip()
-    )
-    df["surface"] = pd.to_numeric(df["surface"], errors="coerce")
+from collections import defaultdict
+from urllib.parse import urlparse
+from scraper_wiki import get_villes_infos
+from cache import cache, make_key, persistent_cache
+from http_utils import http_get, http_post
+from metrics import metrics
+from city_summary import city_partials, load_partials, save_partials, update_partials
+from history import SnapshotWriter, append_snapshot
+
+# Mode incrémental : seules les annonces absentes du jeu nettoyé sont nettoyées / enrichies / géocodées
+INCREMENTAL = os.environ.get("IMMO_INCREMENTAL", "1") == "1"
+
+# Colonnes à faible cardinalité stockées en catégories dans le Parquet
+CATEGORIES = ["city", "DPE", "GES", "exterieur", "stationnement"]
+
+# Géocodeur (surchargeable pour pointer vers un serveur local)
+GEOCODER_URL = os.environ.get("IMMO_GEOCODER_URL", "https://api-adresse.data.gouv.fr")
+GEOCODAGE_CHUNK = int(os.environ.get("IMMO_GEOCODAGE_CHUNK", "5000"))  # lignes par envoi CSV
+WIKI_WORKERS = int(os.environ.get("IMMO_WIKI_WORKERS", "4"))  # lots de villes interrogés en parallèle
+
+# Mode flux : annonces nettoyées par paquets de taille fixe, ajoutées au fur et à mesure
+STREAMING = os.environ.get("IMMO_STREAMING", "0") == "1"
+STREAM_CHUNK = int(os.environ.get("IMMO_STREAM_CHUNK", "500"))  # annonces par paquet
+# Types fixés en mode flux, pour que tous les paquets s'écrivent et se relisent à l'identique
+STREAM_FLOATS = ["price", "surface", "rooms", "latitude", "longitude", "price_per_m2"]
+STREAM_DTYPES = defaultdict(lambda: "str", {c: "float64" for c in STREAM_FLOATS},
+                            is_complete="bool", removed="bool")
 
 # --- Nettoyage rooms ---
 def extract_rooms(val):
@@ -48,8 +40,17 @@ def extract_rooms(val):
     match = re.search(r"(\d+)", text)
     return int(match.group(1)) if match else None
 
-if "rooms" in df.columns:
-    df["rooms"] = df["rooms"].apply(extract_rooms)
+
+def _expand_uniques(series, codes, values):
+    """Redéploie sur chaque ligne un résultat calculé sur les valeurs distinctes (code -1 = NaN)."""
+    return pd.Series(pd.api.extensions.take(values.to_numpy(), codes, allow_fill=True), index=series.index, name=series.name)
+
+
+def extract_rooms_column(rooms):
+    """Version vectorisée de extract_rooms, calculée une fois par libellé distinct."""
+    codes, uniques = pd.factorize(rooms)
+    parsed = pd.to_numeric(pd.Series(uniques).astype(str).str.extract(r"(\d+)", expand=False), errors="coerce")
+    return _expand_uniques(rooms, codes, parsed)
 
 # --- Séparation code postal et ville ---
 def extract_postal_and_city(text):
@@ -69,41 +70,61 @@ def extract_postal_and_city(text):
         city = None
     return pd.Series([postal, city])
 
-if "location" in df.columns:
-    df[["postal_code", "city"]] = df["location"].apply(lambda x: extract_postal_and_city(x))
 
-# --- Infos villes via Wikipedia ---
+def extract_postal_and_city_columns(location):
+    """Version vectorisée de extract_postal_and_city : DataFrame (postal_code, city)."""
+    codes, uniques = pd.factorize(location)
+    parsed = _extract_postal_and_city_uniques(pd.Series(uniques, dtype=object))
+    return pd.DataFrame({
+        col: _expand_uniques(location, codes, parsed[col]) for col in ["postal_code", "city"]
+    })
 
-def enrich_city_infos(city):
-    if not city or pd.isna(city):
-        return pd.Series([None, None, None, None])
-    try:
-        infos = get_ville_infos(city)
-        # Petite pause pour ne pas surcharger Wikipédia
-        time.sleep(0.1)
-        return pd.Series([
-            infos.get("population"),
-            infos.get("superficie"),
-            infos.get("densité"),
-            infos.get("infos")
-        ])
-    except Exception as e:
-        print(f"⚠️ Erreur récupération Wikipédia pour {city}: {e}")
-        return pd.Series([None, None, None, None])
 
-# Ajout des colonnes
-tqdm.pandas(desc="Enrichissement villes Wikipédia")
-df[["Population", "Superficie", "Densité", "Infos_ville"]] = df["city"].progress_apply(enrich_city_infos)
+def _extract_postal_and_city_uniques(location):
+    s = location.astype(str).str.strip()
+    postal = s.str.extract(r"(\d{5})", expand=False)
+    city = (
+        s.str.replace(r"\d{5}", "", regex=True)
+        .str.replace(r'[\(\)\[\]\-–—_:,\/]', ' ', regex=True)
+        .str.replace('\xa0', ' ', regex=False)
+        .str.replace(r'\s+', ' ', regex=True)
+        .str.strip()
+    )
+    result = pd.DataFrame({"postal_code": postal, "city": city.where(city != "")}, dtype=object)
+
+    # La version ligne à ligne ne retire que le premier code trouvé : cas rares traités un par un
+    multi = s.str.count(r"\d{5}") > 1
+    if multi.any():
+        result.loc[multi, ["postal_code", "city"]] = location[multi].apply(extract_postal_and_city).values
+    return result
+
+# --- Infos villes via Wikipedia ---
 
+def enrich_unique_cities(df):
+    """Infos Wikipédia des villes distinctes, par requêtes groupées (une ligne par ville)."""
+    villes = [v for v in df["city"].dropna().unique() if v]
+    # Le délai entre requêtes et le cache disque sont gérés par scraper_wiki
+    infos = get_villes_infos(villes, workers=WIKI_WORKERS)
+    rows = [
+        {
+            "city": city,
+            "Population": infos[city]["population"],
+            "Superficie": infos[city]["superficie"],
+            "Densité": infos[city]["densité"],
+            "Infos_ville": infos[city]["infos"],
+        }
+        for city in villes
+    ]
+    return pd.DataFrame(rows, columns=["city", "Population", "Superficie", "Densité", "Infos_ville"])
 
 # --- Géocodage (lat, lon) ---
-@lru_cache(maxsize=1000)
+@persistent_cache("geocodage", is_valid=lambda coords: coords[0] is not None)
 def get_lat_lon(postal_code, city):
     try:
         if pd.isna(postal_code) or pd.isna(city):
             return None, None
-        url = f"https://api-adresse.data.gouv.fr/search/?q={city}&postcode={postal_code}&limit=1"
-        r = requests.get(url, timeout=5)
+        url = f"{GEOCODER_URL}/search/?q={city}&postcode={postal_code}&limit=1"
+        r = http_get(url, timeout=5)
         if r.status_code == 200:
             data = r.json()
             if data["features"]:
@@ -113,27 +134,378 @@ def get_lat_lon(postal_code, city):
         print(f"Erreur géocodage : {e}")
     return None, None
 
-if {"postal_code", "city"}.issubset(df.columns):
+
+def geocode_batch(pairs):
+    """Géocode des couples (postal_code, city) par lots via l'interface CSV /search/csv/."""
     lats, lons = [], []
-    for idx, row in df.iterrows():
-        lat, lon = get_lat_lon(row["postal_code"], row["city"])
-        lats.append(lat)
-        lons.append(lon)
-    df["latitude"] = lats
-    df["longitude"] = lons
-
-# --- Ajout prix/m² ---
-if "price" in df.columns and "surface" in df.columns:
-    df["price_per_m2"] = df["price"] / df["surface"]
-
-# --- Indicateur de complétude ---
-required_fields = ["price", "surface", "rooms", "reference", "DPE", "GES"]
-df["is_complete"] = df[required_fields].notna().all(axis=1)
-
-# --- Nettoyage minimal (garde les annonces exploitables) ---
-df.dropna(subset=["price", "surface", "rooms"], inplace=True)
-
-# Sauvegarde finale
-df.to_csv(clean_file, index=False, encoding="utf-8-sig")
-print(f"✅ Nettoyage terminé : {clean_file} créé ({len(df)} lignes après nettoyage)")
-print(f"ℹ️ Annonces complètes : {df['is_complete'].sum()} / {len(df)}")
\ No newline at end of file
+    for start in range(0, len(pairs), GEOCODAGE_CHUNK):
+        chunk = pairs.iloc[start:start + GEOCODAGE_CHUNK]
+        try:
+            r = http_post(
+                f"{GEOCODER_URL}/search/csv/",
+                files={"data": ("adresses.csv", chunk.to_csv(index=False))},
+                data={"columns": "city", "postcode": "postal_code",
+                      "result_columns": ["latitude", "longitude"]},
+                timeout=300,
+            )
+            r.raise_for_status()
+            # Le service renvoie les lignes dans l'ordre d'envoi ; une réponse tronquée décalerait les coordonnées
+            result = pd.read_csv(io.StringIO(r.text), dtype=str)
+            if len(result) != len(chunk):
+                raise ValueError(f"{len(result)} lignes reçues pour {len(chunk)} envoyées")
+            lats.extend(pd.to_numeric(result["latitude"], errors="coerce"))
+            lons.extend(pd.to_numeric(result["longitude"], errors="coerce"))
+        except Exception as e:
+            print(f"⚠️ Géocodage par lot indisponible ({e}), repli ligne à ligne")
+            metrics.record_retry(urlparse(GEOCODER_URL).netloc, len(chunk))
+            for postal_code, city in chunk.itertuples(index=False):
+                lat, lon = get_lat_lon(postal_code, city)
+                lats.append(lat)
+                lons.append(lon)
+    return pairs.assign(latitude=lats, longitude=lons)
+
+
+def geocode_unique_pairs(df):
+    """Coordonnées des couples (postal_code, city) distincts : cache disque, puis lots CSV."""
+    pairs = df[["postal_code", "city"]].dropna().drop_duplicates().reset_index(drop=True)
+    keys = [make_key((p, c)) for p, c in pairs.itertuples(index=False)]
+    cached = cache.get_many("geocodage", keys)
+    known = pd.Series([key in cached for key in keys], dtype=bool)
+
+    coords = pairs[known].assign(
+        latitude=[cached[key][0] for key in keys if key in cached],
+        longitude=[cached[key][1] for key in keys if key in cached],
+    )
+    if (~known).any():
+        fetched = geocode_batch(pairs[~known])
+        cache.set_many("geocodage", [(make_key((p, c)), [lat, lon])
+                                     for p, c, lat, lon in fetched.dropna(subset=["latitude"]).itertuples(index=False)])
+        coords = pd.concat([coords, fetched], ignore_index=True)
+    return coords
+
+
+def clean_price(df):
+    """Prix en nombre (suppression de €, des espaces et espaces insécables)."""
+    if "price" in df.columns:
+        df["price"] = (
+            df["price"].astype(str)
+            .str.replace("€", "", regex=False)
+            .str.replace(" ", "", regex=False)
+            .str.replace("\xa0", "", regex=False)
+            .str.strip()
+        )
+        df["price"] = pd.to_numeric(df["price"], errors="coerce")
+    return df
+
+
+def clean_surface(df):
+    """Surface en nombre de m²."""
+    if "surface" in df.columns:
+        df["surface"] = (
+            df["surface"].astype(str)
+            .str.replace("m²", "", regex=False)
+            .str.replace(" ", "", regex=False)
+            .str.replace("\xa0", "", regex=False)
+            .str.strip()
+        )
+        df["surface"] = pd.to_numeric(df["surface"], errors="coerce")
+    return df
+
+
+def clean_rooms(df):
+    if "rooms" in df.columns:
+        df["rooms"] = extract_rooms_column(df["rooms"])
+    return df
+
+
+def split_location(df):
+    if "location" in df.columns:
+        df[["postal_code", "city"]] = extract_postal_and_city_columns(df["location"])
+    return df
+
+
+def add_city_infos(df):
+    """Ajout des colonnes Wikipédia : une requête par ville distincte, puis jointure sur la ville."""
+    return df.merge(enrich_unique_cities(df), on="city", how="left")
+
+
+def add_coordinates(df):
+    """Géocodage (lat, lon) : une fois par couple distinct, puis jointure."""
+    if {"postal_code", "city"}.issubset(df.columns):
+        coords = geocode_unique_pairs(df)
+        df = df.merge(coords, on=["postal_code", "city"], how="left")
+    return df
+
+
+def finish_listings(df):
+    """Prix/m², indicateur de complétude, puis suppression des annonces inexploitables."""
+    if "price" in df.columns and "surface" in df.columns:
+        df["price_per_m2"] = df["price"] / df["surface"]
+
+    required_fields = ["price", "surface", "rooms", "reference", "DPE", "GES"]
+    df["is_complete"] = df[required_fields].notna().all(axis=1)
+
+    # --- Nettoyage minimal (garde les annonces exploitables) ---
+    df.dropna(subset=["price", "surface", "rooms"], inplace=True)
+    return df
+
+
+# Étapes de clean_listings, dans l'ordre (nommées pour les benchmarks)
+CLEANING_STAGES = [
+    ("prix", clean_price),
+    ("surface", clean_surface),
+    ("pieces", clean_rooms),
+    ("code_postal_ville", split_location),
+    ("infos_villes", add_city_infos),
+    ("geocodage", add_coordinates),
+    ("finalisation", finish_listings),
+]
+
+
+def clean_listings(df):
+    """Nettoie, enrichit et géocode des annonces brutes."""
+    for name, stage in CLEANING_STAGES:
+        with metrics.timed(f"nettoyage/{name}"):
+            df = stage(df)
+    return df
+
+
+def fresh_prices(raw):
+    """Prix relus des annonces déjà connues et retéléchargées (revérification), par lien."""
+    prix = clean_price(raw[["link", "price"]].copy()).dropna(subset=["price"])
+    return prix.drop_duplicates("link", keep="last").set_index("link")["price"]
+
+
+def apply_prices(df, prix):
+    """Met à jour en place prix et prix/m² des annonces revérifiées dont le prix a changé.
+
+    Renvoie les lignes concernées telles qu'elles étaient avant (pour retirer l'ancien prix des agrégats).
+    """
+    nouveau = df["link"].map(prix)
+    modifie = nouveau.notna() & (nouveau != df["price"])
+    avant = df[modifie].copy()
+    df.loc[modifie, "price"] = nouveau[modifie]
+    df.loc[modifie, "price_per_m2"] = df.loc[modifie, "price"] / df.loc[modifie, "surface"]
+    if modifie.any():
+        print(f"💶 Prix modifiés : {int(modifie.sum())} annonce(s)")
+    return avant
+
+
+def save_parquet(df, path):
+    """Écrit la version typée (colonnes catégorielles) du jeu nettoyé, de façon atomique."""
+    typed = df.astype({c: "category" for c in CATEGORIES if c in df.columns})
+    typed["postal_code"] = typed["postal_code"].astype(object)
+    tmp = path + ".tmp"
+    typed.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+def read_raw_chunks(raw_file):
+    """CSV brut relu par paquets, tout en texte comme les enregistrements du scraper."""
+    return pd.read_csv(raw_file, dtype=str, chunksize=STREAM_CHUNK)
+
+
+def _stream_schema(columns):
+    """Schéma Arrow fixe du Parquet écrit paquet par paquet (catégories en dictionnaires)."""
+    def arrow_type(col):
+        if col in CATEGORIES:
+            return pa.dictionary(pa.int32(), pa.string())
+        if col in STREAM_FLOATS:
+            return pa.float64()
+        if col in ("is_complete", "removed"):
+            return pa.bool_()
+        return pa.string()
+    return pa.schema([(col, arrow_type(col)) for col in columns])
+
+
+def clean_stream(chunks, data_dir="data", cancel=None):
+    """Mode flux : nettoie les annonces brutes paquet par paquet, au fil de leur arrivée.
+
+    Chaque paquet nettoyé est ajouté aussitôt au CSV nettoyé, avec la synthèse par ville
+    à jour ; la mémoire dépend de la taille d'un paquet, pas de celle du crawl (seuls les prix
+    relus des annonces déjà connues sont gardés jusqu'à la passe finale, un nombre par annonce).
+    """
+    clean_file = os.path.join(data_dir, "cleaned_data.csv")
+    summary_file = os.path.join(data_dir, "villes_summary.parquet")
+
+    if INCREMENTAL and os.path.exists(clean_file):
+        connus = set(pd.read_csv(clean_file, usecols=["link"])["link"])
+        colonnes = list(pd.read_csv(clean_file, nrows=0).columns)
+        # Sans synthèse existante, elle est recalculée entièrement lors de la passe finale
+        rebuild = not os.path.exists(summary_file)
+        partials = city_partials(pd.DataFrame()) if rebuild else load_partials(summary_file)
+    else:
+        connus, colonnes, rebuild = set(), None, False
+        partials = city_partials(pd.DataFrame())
+        if os.path.exists(clean_file):
+            os.remove(clean_file)
+
+    nouvelles = 0
+    prix = []  # prix relus des annonces connues, appliqués lors de la passe finale
+    for raw in chunks:
+        if cancel is not None and cancel.is_set():
+            raise InterruptedError("Nettoyage annulé")
+        connue = raw["link"].isin(connus)
+        if connue.any():
+            prix.append(fresh_prices(raw[connue]))
+        raw = raw[~connue].reset_index(drop=True)
+        if raw.empty:
+            continue
+        df = clean_listings(raw).astype({c: "float64" for c in STREAM_FLOATS})
+        df["removed"] = False
+        if colonnes is None:
+            colonnes = list(df.columns)
+            df.to_csv(clean_file, index=False, encoding="utf-8-sig")
+        else:
+            df.reindex(columns=colonnes).to_csv(clean_file, mode="a", header=False, index=False, encoding="utf-8")
+        if not rebuild:
+            partials = update_partials(partials, df, df.iloc[:0])
+            save_partials(partials, summary_file)
+        nouvelles += len(df)
+        print(f"🧩 Paquet nettoyé : {len(df)} annonces ({nouvelles} depuis le début du flux)")
+
+    if cancel is not None and cancel.is_set():
+        raise InterruptedError("Nettoyage annulé")
+    prix = pd.concat(prix) if prix else pd.Series(dtype=float)
+    _finalize_stream(data_dir, partials, rebuild, prix[~prix.index.duplicated(keep="last")])
+
+
+def _finalize_stream(data_dir, partials, rebuild, prix):
+    """Passe finale, elle aussi par paquets : prix revérifiés, annonces retirées, synthèse par ville et Parquet."""
+    clean_file = os.path.join(data_dir, "cleaned_data.csv")
+    clean_parquet = os.path.join(data_dir, "cleaned_data.parquet")
+    actifs_file = os.path.join(data_dir, "liens_actifs.csv")
+    summary_file = os.path.join(data_dir, "villes_summary.parquet")
+    if not os.path.exists(clean_file):
+        print("ℹ️ Aucune annonce à nettoyer")
+        return
+
+    actifs = set(pd.read_csv(actifs_file)["link"]) if os.path.exists(actifs_file) else None
+    if rebuild:
+        partials = city_partials(pd.DataFrame())
+    tmp_csv, tmp_parquet = clean_file + ".tmp", clean_parquet + ".tmp"
+    writer = None
+    historique = SnapshotWriter(data_dir)
+    total = complets = retirees = 0
+    try:
+        for i, df in enumerate(pd.read_csv(clean_file, dtype=STREAM_DTYPES, chunksize=STREAM_CHUNK)):
+            etait_actif = ~df["removed"] if "removed" in df.columns else pd.Series(True, index=df.index)
+            df["removed"] = ~df["link"].isin(actifs) if actifs is not None else False
+            actif = ~df["removed"]
+            avant = apply_prices(df, prix)
+            if rebuild:
+                partials = update_partials(partials, df[actif], df.iloc[:0])
+            else:
+                # Prix modifié d'une annonce restée active : l'ancienne ligne sort des agrégats, la nouvelle y entre
+                maj = df["link"].isin(avant["link"]) & actif & etait_actif
+                partials = update_partials(
+                    partials,
+                    pd.concat([df[actif & ~etait_actif], df[maj]]),
+                    pd.concat([df[~actif & etait_actif], avant[avant["link"].isin(df.loc[maj, "link"])]]))
+
+            if i == 0:
+                df.to_csv(tmp_csv, index=False, encoding="utf-8-sig")
+                schema = _stream_schema(df.columns)
+                writer = pq.ParquetWriter(tmp_parquet, schema)
+            else:
+                df.to_csv(tmp_csv, mode="a", header=False, index=False, encoding="utf-8")
+            writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            historique.write(df)
+            total += len(df)
+            complets += int(df["is_complete"].sum())
+            retirees += int(df["removed"].sum())
+    except BaseException:
+        historique.abort()
+        raise
+    finally:
+        if writer is not None:
+            writer.close()
+
+    os.replace(tmp_csv, clean_file)
+    os.replace(tmp_parquet, clean_parquet)
+    save_partials(partials, summary_file)
+    historique.close()
+    print(f"✅ Nettoyage en flux terminé : {clean_file} ({total} lignes)")
+    print(f"ℹ️ Annonces complètes : {complets} / {total}")
+    print(f"ℹ️ Annonces retirées : {retirees} / {total}")
+    print(f"ℹ️ Cache disque (hits/misses) : {cache.stats()}")
+
+
+def main(data_dir="data", cancel=None):
+    raw_file = os.path.join(data_dir, "raw_data.csv")
+    clean_file = os.path.join(data_dir, "cleaned_data.csv")
+    clean_parquet = os.path.join(data_dir, "cleaned_data.parquet")
+    actifs_file = os.path.join(data_dir, "liens_actifs.csv")
+    summary_file = os.path.join(data_dir, "villes_summary.parquet")
+
+    # Vérifie si le fichier existe
+    if not os.path.exists(raw_file):
+        raise FileNotFoundError(f"❌ Le fichier {raw_file} est introuvable. Lance d'abord scraper.py")
+
+    if STREAMING:
+        clean_stream(read_raw_chunks(raw_file), data_dir, cancel)
+        return
+
+    df = pd.read_csv(raw_file)
+    print(f"📊 Lignes brutes importées : {len(df)}")
+
+    # --- Mode incrémental : on ne retraite pas les annonces déjà nettoyées ---
+    # Les annonces déjà présentes et retéléchargées (revérification) ne mettent à jour que leur prix
+    ancien, avant = None, None
+    if INCREMENTAL and os.path.exists(clean_file):
+        ancien = pd.read_csv(clean_file, dtype={"postal_code": str})
+        connue = df["link"].isin(ancien["link"])
+        avant = apply_prices(ancien, fresh_prices(df[connue]))
+        df = df[~connue].reset_index(drop=True)
+        print(f"🆕 Nouvelles annonces à nettoyer : {len(df)} ({len(ancien)} déjà présentes, "
+              f"{int(connue.sum())} revérifiées)")
+        if "removed" in ancien.columns:
+            anciens_actifs = set(ancien.loc[~ancien["removed"], "link"])
+        else:
+            anciens_actifs = set(ancien["link"])
+
+    if cancel is not None and cancel.is_set():
+        raise InterruptedError("Nettoyage annulé")
+
+    if df.empty and ancien is not None:
+        df = ancien
+    elif ancien is not None:
+        df = pd.concat([ancien, clean_listings(df)], ignore_index=True)
+    else:
+        df = clean_listings(df)
+
+    # --- Annonces retirées : absentes du dernier passage du scraper ---
+    if os.path.exists(actifs_file):
+        actifs = pd.read_csv(actifs_file)["link"]
+        df["removed"] = ~df["link"].isin(actifs)
+    else:
+        df["removed"] = False
+
+    # --- Synthèse par ville (annonces actives) : mise à jour par différence en mode incrémental ---
+    actif = ~df["removed"]
+    if ancien is not None and os.path.exists(summary_file):
+        etait_actif = df["link"].isin(anciens_actifs)
+        # Prix modifié d'une annonce restée active : l'ancienne ligne sort des agrégats, la nouvelle y entre
+        maj = df["link"].isin(avant["link"]) & actif & etait_actif
+        partials = update_partials(load_partials(summary_file),
+                                   pd.concat([df[actif & ~etait_actif], df[maj]]),
+                                   pd.concat([df[~actif & etait_actif], avant[avant["link"].isin(df.loc[maj, "link"])]]))
+    else:
+        partials = city_partials(df[actif])
+
+    if cancel is not None and cancel.is_set():
+        raise InterruptedError("Nettoyage annulé")
+
+    # Sauvegarde finale
+    df.to_csv(clean_file, index=False, encoding="utf-8-sig")
+    save_parquet(df, clean_parquet)
+    save_partials(partials, summary_file)
+    append_snapshot(df, data_dir)
+    print(f"✅ Nettoyage terminé : {clean_file} créé ({len(df)} lignes après nettoyage)")
+    print(f"ℹ️ Annonces complètes : {df['is_complete'].sum()} / {len(df)}")
+    print(f"ℹ️ Annonces retirées : {df['removed'].sum()} / {len(df)}")
+    print(f"ℹ️ Cache disque (hits/misses) : {cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
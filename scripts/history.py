@@ -0,0 +1,129 @@
+import os
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+HISTORY_DIR = "historique"                 # un sous-dossier date=AAAA-MM-JJ par jour, un fichier par passage
+ROLLUP_FILE = "historique_villes.parquet"  # agrégats par ville et par jour, seule source de la vue tendances
+
+# Colonnes gardées à chaque passage : clés de l'annonce et ce qui sert à suivre prix et présence
+SNAPSHOT_SCHEMA = pa.schema([
+    ("snapshot_at", pa.timestamp("s")),
+    ("link", pa.string()),
+    ("reference", pa.string()),
+    ("city", pa.string()),
+    ("postal_code", pa.string()),
+    ("price", pa.float64()),
+    ("surface", pa.float64()),
+    ("price_per_m2", pa.float64()),
+    ("rooms", pa.float64()),
+    ("DPE", pa.string()),
+])
+
+ROLLUP_COLUMNS = ["nb_annonces", "price_sum", "price_count", "ppm2_sum", "ppm2_count"]
+
+
+def day_partials(df):
+    """Agrégats additifs par ville d'un lot d'annonces actives (sommes et comptages)."""
+    if df.empty:
+        return pd.DataFrame(columns=ROLLUP_COLUMNS, dtype=float)
+    grouped = df.groupby("city", observed=True)
+    return pd.DataFrame({
+        "nb_annonces": grouped.size(),
+        "price_sum": grouped["price"].sum(),
+        "price_count": grouped["price"].count(),
+        "ppm2_sum": grouped["price_per_m2"].sum(),
+        "ppm2_count": grouped["price_per_m2"].count(),
+    }).astype(float)
+
+
+def update_rollups(path, day, partials):
+    """Remplace les agrégats du jour par ceux du dernier passage, sans relire l'historique des annonces."""
+    rows = partials.rename_axis("city").reset_index().assign(date=pd.Timestamp(day))
+    if os.path.exists(path):
+        rollups = pd.read_parquet(path)
+        rows = pd.concat([rollups[rollups["date"] != pd.Timestamp(day)], rows], ignore_index=True)
+    rows = rows[["date", "city"] + ROLLUP_COLUMNS].sort_values(["date", "city"]).reset_index(drop=True)
+    tmp = path + ".tmp"
+    rows.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class SnapshotWriter:
+    """Ajoute le passage courant à l'historique : les annonces actives arrivent par lots via `write`.
+
+    Le fichier du passage n'apparaît dans sa partition qu'à `close`, en même temps que les
+    agrégats du jour : un passage interrompu ne laisse rien de visible.
+    """
+
+    def __init__(self, data_dir, snapshot_at=None):
+        self.snapshot_at = datetime.fromtimestamp(int(snapshot_at or time.time()))
+        self.day = self.snapshot_at.date()
+        partition = os.path.join(data_dir, HISTORY_DIR, f"date={self.day.isoformat()}")
+        os.makedirs(partition, exist_ok=True)
+        # Suffixe aléatoire : deux passages dans la même seconde ne s'écrasent pas
+        name = f"run_{self.snapshot_at:%H%M%S}_{uuid.uuid4().hex[:8]}.parquet"
+        self.path = os.path.join(partition, name)
+        # Préfixe "." : ignoré par la lecture du dataset tant que le fichier n'est pas complet
+        self._tmp = os.path.join(partition, f".{name}.tmp")
+        self.rollup_path = os.path.join(data_dir, ROLLUP_FILE)
+        self._writer = pq.ParquetWriter(self._tmp, SNAPSHOT_SCHEMA)
+        self._partials = day_partials(pd.DataFrame())
+        self.rows = 0
+
+    def write(self, df):
+        actives = df[~df["removed"]] if "removed" in df.columns else df
+        if actives.empty:
+            return
+        table = pd.DataFrame({
+            name: (actives[name].astype(object).where(actives[name].notna(), None)
+                   if SNAPSHOT_SCHEMA.field(name).type == pa.string() else actives[name])
+            for name in SNAPSHOT_SCHEMA.names if name != "snapshot_at"
+        }).assign(snapshot_at=self.snapshot_at)
+        self._writer.write_table(pa.Table.from_pandas(table, schema=SNAPSHOT_SCHEMA, preserve_index=False))
+        self._partials = self._partials.add(day_partials(actives), fill_value=0)
+        self.rows += len(actives)
+
+    def close(self):
+        self._writer.close()
+        os.replace(self._tmp, self.path)
+        update_rollups(self.rollup_path, self.day, self._partials)
+        print(f"🗄️ Historique : {self.rows} annonces ajoutées à {self.path}")
+
+    def abort(self):
+        self._writer.close()
+        if os.path.exists(self._tmp):
+            os.remove(self._tmp)
+
+
+def append_snapshot(df, data_dir, snapshot_at=None):
+    """Passage complet en une fois (mode normal du cleaner)."""
+    writer = SnapshotWriter(data_dir, snapshot_at)
+    try:
+        writer.write(df)
+        writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+
+
+def load_trends(path):
+    """Prix moyen et prix/m² moyen par ville et par jour, lus dans les seuls agrégats."""
+    rollups = pd.read_parquet(path)
+    rollups["prix_moyen"] = rollups["price_sum"] / rollups["price_count"]
+    rollups["prix_m2_moyen"] = rollups["ppm2_sum"] / rollups["ppm2_count"]
+    return rollups
+
+
+def listing_history(data_dir, link):
+    """Passages successifs d'une annonce (prix, présence), le filtre étant appliqué à la lecture."""
+    path = os.path.join(data_dir, HISTORY_DIR)
+    if not os.path.isdir(path):
+        return pd.DataFrame(columns=SNAPSHOT_SCHEMA.names)
+    dataset = ds.dataset(path, format="parquet", partitioning="hive")
+    return dataset.to_table(filter=ds.field("link") == link).to_pandas().sort_values("snapshot_at")
@@ -0,0 +1,81 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+
+from metrics import metrics
+
+# Une session par thread : réutilise les connexions sans partager l'état entre workers
+_local = threading.local()
+
+
+def get_session():
+    """Retourne la session HTTP propre au thread courant."""
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        _local.session = session
+    return session
+
+
+class HostThrottle:
+    """Délai minimal entre deux requêtes vers un même hôte, partagé entre les threads."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._lock = threading.Lock()
+        self._next_slot = {}
+
+    def wait(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, now))
+            self._next_slot[host] = slot + self.delay
+        pause = slot - now
+        if pause > 0:
+            time.sleep(pause)
+
+
+class WorkerThrottle:
+    """Délai minimal entre deux requêtes d'un même thread : chaque worker reste poli de son côté."""
+
+    def __init__(self, delay):
+        self.delay = delay
+        self._local = threading.local()
+
+    def wait(self, url):
+        now = time.monotonic()
+        pause = getattr(self._local, "next_slot", now) - now
+        if pause > 0:
+            time.sleep(pause)
+        self._local.next_slot = max(now, time.monotonic()) + self.delay
+
+
+def timed_request(method, url, session=None, **kwargs):
+    """Requête HTTP mesurée : latence, nombre de requêtes et erreurs (exception ou statut >= 400) par hôte."""
+    host = urlparse(url).netloc
+    start = time.perf_counter()
+    try:
+        response = (session or requests).request(method, url, **kwargs)
+    except Exception:
+        metrics.record_request(host, time.perf_counter() - start, error=True)
+        raise
+    metrics.record_request(host, time.perf_counter() - start, error=response.status_code >= 400)
+    return response
+
+
+def http_get(url, **kwargs):
+    return timed_request("GET", url, **kwargs)
+
+
+def http_post(url, **kwargs):
+    return timed_request("POST", url, **kwargs)
+
+
+def polite_get(url, throttle=None, **kwargs):
+    """GET via la session du thread, après avoir attendu son tour auprès de l'hôte."""
+    if throttle is not None:
+        throttle.wait(url)
+    return timed_request("GET", url, session=get_session(), **kwargs)
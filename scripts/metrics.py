@@ -0,0 +1,129 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from cache import cache
+
+# Bornes (ms) des classes de l'histogramme de latence ; une dernière classe reçoit le reste
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000]
+KEEP_RUNS = int(os.environ.get("IMMO_METRICS_KEEP", "20"))  # fichiers de mesures conservés
+
+
+class Metrics:
+    """Mesures d'une exécution du pipeline : durées, requêtes HTTP par hôte, cache. Partagé entre threads."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.started_at = time.time()
+            self.stages = {}
+            self.timings = {}
+            self.hosts = {}
+            self._cache_start = {
+                "hits": dict(cache.hits),
+                "misses": dict(cache.misses),
+            }
+
+    @contextmanager
+    def timed(self, name):
+        """Durée cumulée (et nombre d'appels) d'un bloc, additionnée entre threads et paquets."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                entry = self.timings.setdefault(name, {"count": 0, "seconds": 0.0})
+                entry["count"] += 1
+                entry["seconds"] += elapsed
+
+    def stage(self, name, status, seconds=0.0):
+        with self._lock:
+            self.stages[name] = {"status": status, "seconds": round(seconds, 3)}
+
+    def _host(self, host):
+        return self.hosts.setdefault(host, {
+            "requests": 0, "errors": 0, "retries": 0,
+            "latency_sum_ms": 0.0, "latency_max_ms": 0.0,
+            "histogram": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        })
+
+    def record_request(self, host, seconds, error=False):
+        ms = seconds * 1000
+        bucket = next((i for i, bound in enumerate(LATENCY_BUCKETS_MS) if ms <= bound), len(LATENCY_BUCKETS_MS))
+        with self._lock:
+            entry = self._host(host)
+            entry["requests"] += 1
+            entry["errors"] += int(error)
+            entry["latency_sum_ms"] += ms
+            entry["latency_max_ms"] = max(entry["latency_max_ms"], ms)
+            entry["histogram"][bucket] += 1
+
+    def record_retry(self, host, count=1):
+        with self._lock:
+            self._host(host)["retries"] += count
+
+    def _cache_rates(self):
+        rates = {}
+        for source in sorted(set(cache.hits) | set(cache.misses)):
+            hits = cache.hits.get(source, 0) - self._cache_start["hits"].get(source, 0)
+            misses = cache.misses.get(source, 0) - self._cache_start["misses"].get(source, 0)
+            if hits or misses:
+                rates[source] = {"hits": hits, "misses": misses, "hit_rate": round(hits / (hits + misses), 3)}
+        return rates
+
+    def snapshot(self, status):
+        with self._lock:
+            return {
+                "started_at": self.started_at,
+                "finished_at": time.time(),
+                "status": status,
+                "stages": dict(self.stages),
+                "timings": {k: {"count": v["count"], "seconds": round(v["seconds"], 3)}
+                            for k, v in sorted(self.timings.items())},
+                "http": {host: dict(v, latency_sum_ms=round(v["latency_sum_ms"], 1),
+                                    latency_max_ms=round(v["latency_max_ms"], 1), histogram=list(v["histogram"]))
+                         for host, v in sorted(self.hosts.items())},
+                "latency_buckets_ms": LATENCY_BUCKETS_MS,
+                "cache": self._cache_rates(),
+            }
+
+    def save(self, metrics_dir, status):
+        """Écrit les mesures de l'exécution dans un fichier daté et ne garde que les plus récents."""
+        os.makedirs(metrics_dir, exist_ok=True)
+        # Microsecondes : deux exécutions dans la même seconde ne s'écrasent pas, l'ordre des noms reste chronologique
+        name = f"run_{datetime.fromtimestamp(self.started_at):%Y%m%d_%H%M%S_%f}.json"
+        path = os.path.join(metrics_dir, name)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(status), f, ensure_ascii=False, indent=2)
+        os.replace(tmp, path)
+        for old in list_runs(metrics_dir)[KEEP_RUNS:]:
+            os.remove(old)
+        return path
+
+
+def list_runs(metrics_dir):
+    """Fichiers de mesures, du plus récent au plus ancien."""
+    if not os.path.isdir(metrics_dir):
+        return []
+    names = sorted((n for n in os.listdir(metrics_dir) if n.startswith("run_") and n.endswith(".json")), reverse=True)
+    return [os.path.join(metrics_dir, n) for n in names]
+
+
+def load_latest(metrics_dir):
+    runs = list_runs(metrics_dir)
+    if not runs:
+        return None
+    with open(runs[0], encoding="utf-8") as f:
+        return json.load(f)
+
+
+# Mesures de l'exécution en cours, alimentées par les scrapers, le cleaner et le pipeline
+metrics = Metrics()
@@ -0,0 +1,218 @@
+import hashlib
+import json
+import os
+import sys
+import time
+
+import cleaner
+import scraper_annonces
+import scraper_ville_ideale
+from metrics import metrics
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = "pipeline_state.json"  # clé d'entrée de la dernière exécution réussie de chaque étape
+
+# Le site d'annonces n'a pas d'empreinte locale : on le considère inchangé pendant ce délai (secondes)
+SCRAPE_TTL = int(os.environ.get("IMMO_SCRAPE_TTL", "900"))
+
+# Étapes du pipeline. Une étape est relancée si sa clé (contenu de ses entrées, code source,
+# paramètres d'environnement) diffère de celle de sa dernière exécution, si une de ses sorties
+# manque, ou si son TTL est dépassé.
+STAGES = [
+    {
+        "name": "annonces",
+        "label": "Annonces",
+        "run": scraper_annonces.main,
+        "deps": [],
+        "inputs": [],
+        "outputs": ["raw_data.csv", "liens_actifs.csv", scraper_annonces.LIENS_VUS],
+        "sources": ["scraper_annonces.py", "http_utils.py"],
+        "env": ["SCRAPER_WORKERS", "SCRAPER_DELAI", "SCRAPER_TIMEOUT", "IMMO_INCREMENTAL", "IMMO_ANNONCES_URL",
+                "IMMO_MAX_PAGES", "IMMO_PRIX_TTL"],
+        "ttl": SCRAPE_TTL,
+    },
+    {
+        "name": "nettoyage",
+        "label": "Nettoyage",
+        "run": cleaner.main,
+        "deps": ["annonces"],
+        "inputs": ["raw_data.csv", "liens_actifs.csv"],
+        "outputs": ["cleaned_data.csv", "cleaned_data.parquet", "villes_summary.parquet", "historique_villes.parquet"],
+        "sources": ["cleaner.py", "city_summary.py", "history.py", "scraper_wiki.py", "cache.py"],
+        "env": ["IMMO_INCREMENTAL", "IMMO_GEOCODER_URL"],
+        "ttl": None,
+    },
+]
+
+if scraper_annonces.STREAMING:
+    # Mode flux : le scraper alimente directement le nettoyage, les deux ne font qu'une étape
+    STAGES = [{
+        "name": "annonces_flux",
+        "label": "Annonces et nettoyage (flux)",
+        "run": scraper_annonces.main,
+        "deps": [],
+        "inputs": [],
+        "outputs": STAGES[0]["outputs"] + STAGES[1]["outputs"],
+        "sources": STAGES[0]["sources"] + STAGES[1]["sources"],
+        "env": sorted(set(STAGES[0]["env"] + STAGES[1]["env"])) + ["IMMO_STREAM_CHUNK"],
+        "ttl": SCRAPE_TTL,
+    }]
+
+# Notes Ville Idéale des villes présentes : relancées dès que la synthèse par ville change
+# (les villes déjà notées sortent du cache disque sans requête)
+STAGES.append({
+    "name": "notes_villes",
+    "label": "Notes Ville Idéale",
+    "run": scraper_ville_ideale.main,
+    "deps": [STAGES[-1]["name"]],
+    "inputs": ["villes_summary.parquet"],
+    "outputs": [scraper_ville_ideale.SCORES_FILE],
+    "sources": ["scraper_ville_ideale.py", "http_utils.py", "cache.py"],
+    "env": ["IMMO_VI_WORKERS", "IMMO_VILLE_IDEALE_URL"],
+    "ttl": None,
+})
+
+
+def toposort(stages):
+    """Ordre d'exécution respectant les dépendances (ordre de déclaration à égalité)."""
+    ordered, seen = [], set()
+    pending = list(stages)
+    while pending:
+        ready = [s for s in pending if set(s["deps"]) <= seen]
+        if not ready:
+            raise ValueError(f"Dépendances circulaires ou inconnues : {[s['name'] for s in pending]}")
+        for stage in ready:
+            ordered.append(stage)
+            seen.add(stage["name"])
+            pending.remove(stage)
+    return ordered
+
+
+def _hash_file(h, path):
+    if not os.path.exists(path):
+        h.update(b"<absent>")
+        return
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+
+
+def stage_key(stage, data_dir):
+    """Empreinte de tout ce qui détermine les sorties d'une étape."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(stage["name"].encode())
+    for name in stage["sources"]:
+        h.update(name.encode())
+        _hash_file(h, os.path.join(SCRIPTS_DIR, name))
+    for var in stage["env"]:
+        h.update(f"{var}={os.environ.get(var, '')}".encode())
+    for name in stage["inputs"]:
+        h.update(name.encode())
+        _hash_file(h, os.path.join(data_dir, name))
+    return h.hexdigest()
+
+
+def load_state(data_dir):
+    path = os.path.join(data_dir, STATE_FILE)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(data_dir, state):
+    path = os.path.join(data_dir, STATE_FILE)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=2)
+    os.replace(tmp, path)
+
+
+def _stale_reason(stage, key, state, data_dir, force):
+    """Raison de relancer l'étape, ou None si ses sorties sont à jour."""
+    if force:
+        return "relance forcée"
+    previous = state.get(stage["name"])
+    if previous is None:
+        return "jamais exécutée"
+    if any(not os.path.exists(os.path.join(data_dir, name)) for name in stage["outputs"]):
+        return "sortie manquante"
+    if previous["key"] != key:
+        return "entrées modifiées"
+    if stage["ttl"] is not None and time.time() - previous["ran_at"] > stage["ttl"]:
+        return "source externe à revérifier"
+    return None
+
+
+def plan(data_dir="data", force=False):
+    """Étapes à relancer (nom, raison), sans rien exécuter."""
+    state = load_state(data_dir)
+    todo = {}
+    for stage in toposort(STAGES):
+        reason = _stale_reason(stage, stage_key(stage, data_dir), state, data_dir, force)
+        if reason is None and any(dep in todo for dep in stage["deps"]):
+            reason = "étape amont à relancer"
+        if reason is not None:
+            todo[stage["name"]] = reason
+    return list(todo.items())
+
+
+def run_pipeline(data_dir="data", force=False, on_progress=None, cancel=None, metrics_dir=None):
+    """Exécute les étapes dans le processus courant, en sautant celles dont les entrées n'ont pas changé.
+
+    `on_progress(nom, statut, message)` est appelé au début et à la fin de chaque étape ;
+    une annulation via `cancel` (threading.Event) lève InterruptedError. Les mesures de
+    l'exécution (durées, HTTP, cache) sont écrites dans `metrics_dir` (data_dir/metrics par défaut),
+    y compris en cas d'échec.
+    """
+    def notify(stage, status, message=""):
+        if on_progress is not None:
+            on_progress(stage["name"], status, message)
+
+    metrics.reset()
+    status = "error"
+    state = load_state(data_dir)
+    executed = []
+    try:
+        for stage in toposort(STAGES):
+            if cancel is not None and cancel.is_set():
+                raise InterruptedError("Pipeline annulé")
+            # La clé est calculée après les étapes amont : une sortie amont identique ne relance rien
+            key = stage_key(stage, data_dir)
+            reason = _stale_reason(stage, key, state, data_dir, force)
+            if reason is None:
+                metrics.stage(stage["name"], "skipped")
+                notify(stage, "skipped", "ignorée : entrées inchangées")
+                continue
+            notify(stage, "running", reason)
+            start = time.perf_counter()
+            try:
+                stage["run"](data_dir=data_dir, cancel=cancel)
+            except Exception as e:
+                metrics.stage(stage["name"], "error", time.perf_counter() - start)
+                notify(stage, "error", str(e))
+                raise
+            metrics.stage(stage["name"], "done", time.perf_counter() - start)
+            state[stage["name"]] = {"key": key, "ran_at": time.time()}
+            save_state(data_dir, state)
+            executed.append(stage["name"])
+            notify(stage, "done", f"terminée en {time.perf_counter() - start:.1f}s")
+        status = "done"
+    except InterruptedError:
+        status = "cancelled"
+        raise
+    finally:
+        metrics.save(metrics_dir or os.path.join(data_dir, "metrics"), status)
+    return executed
+
+
+if __name__ == "__main__":
+    # python scripts/pipeline.py [--force] [dossier_data]
+    args = [a for a in sys.argv[1:] if a != "--force"]
+    data_dir = args[0] if args else "data"
+    start = time.perf_counter()
+    executed = run_pipeline(
+        data_dir, force="--force" in sys.argv,
+        on_progress=lambda name, status, message: print(f"▶️ {name} : {status} {message}"),
+    )
+    print(f"✅ Pipeline terminé en {time.perf_counter() - start:.2f}s ({len(executed)} étape(s) exécutée(s))")
@@ -1,30 +1,185 @@
 import time
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, NavigableString, SoupStrainer
 import pandas as pd
+import hashlib
+import json
 import requests
 import os
+import shutil
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+from http_utils import HostThrottle, polite_get
+from metrics import metrics
+from cleaner import STREAMING, STREAM_CHUNK, clean_stream
 
-# Dossier data
-os.makedirs("data", exist_ok=True)
+ANNONCES_URL = os.environ.get("IMMO_ANNONCES_URL", "https://www.etreproprio.com")
+MAX_PAGES = int(os.environ.get("IMMO_MAX_PAGES", "0"))  # 0 = jusqu'à la dernière page de résultats
+MAX_WORKERS = int(os.environ.get("SCRAPER_WORKERS", "8"))  # 1 = mode séquentiel
+DELAI_PAR_HOTE = float(os.environ.get("SCRAPER_DELAI", "0.2"))  # secondes entre deux requêtes vers un même hôte
+TIMEOUT = float(os.environ.get("SCRAPER_TIMEOUT", "15"))  # secondes : une connexion bloquée ne fige pas le crawl
+INCREMENTAL = os.environ.get("IMMO_INCREMENTAL", "1") == "1"  # ne télécharge que les annonces jamais vues
 
-liens = []
-pages = 3  # Nombre de pages à scraper
+# Point de reprise d'un crawl interrompu (frontière + annonces déjà téléchargées), ignoré s'il est trop vieux
+REPRISE_DIR = "crawl_reprise"
+REPRISE_TTL = int(os.environ.get("IMMO_REPRISE_TTL", str(24 * 3600)))
+# Liens déjà téléchargés (mode incrémental), même quand le cleaner n'a pas gardé l'annonce, et date du téléchargement
+LIENS_VUS = "liens_vus.csv"
+# Délai (secondes) après lequel une annonce connue et toujours en ligne est retéléchargée pour relire son prix
+# (historique des prix) ; 0 = jamais
+PRIX_TTL = int(os.environ.get("IMMO_PRIX_TTL", str(24 * 3600)))
 
-for i in range(1, pages + 1):
-    url = f"https://www.etreproprio.com/annonces/tf.odd.g{i}#list"
-    page = requests.get(url)
-    print(f"Scraping page {i}: {url}")
+COLONNES = ["link", "price", "surface", "rooms", "DPE", "GES", "location",
+            "reference", "exterieur", "stationnement", "image"]
 
-    soup = BeautifulSoup(page.content, "html.parser")
 
-    annonces = soup.find("div", class_="ep-search-list-wrapper").find_all("a")
-    for a in annonces:
+class CrawlFrontier:
+    """Frontière du crawl : pages de recherche visitées, liens d'annonces trouvés et annonces téléchargées.
+
+    Avec un `dossier`, tout est sauvegardé au fil de l'eau par ajout en fin de fichier (pages.jsonl :
+    une ligne par page ou par dernière page trouvée ; annonces.jsonl : une ligne par annonce) :
+    un crawl interrompu reprend là où il s'était arrêté. Seuls les liens des annonces téléchargées
+    restent en mémoire ; les annonces elles-mêmes ne sont relues dans annonces.jsonl qu'à la reprise.
+    """
+
+    def __init__(self, dossier=None):
+        self.dossier = dossier
+        self._lock = threading.Lock()
+        self.pages = {}             # numéro de page -> liens trouvés
+        self.derniere_page = None   # connue dès qu'une page vide ou déjà vue est rencontrée
+        self.telechargees = set()   # liens des annonces déjà téléchargées (celles de la reprise comprises)
+        self._reprises = set()      # liens des annonces téléchargées par le crawl interrompu
+        self._empreintes = {}       # empreinte de l'ensemble des liens -> numéro de page
+        self.created_at = time.time()
+        if dossier is not None:
+            self._charger()
+
+    def _fichier(self, nom):
+        return os.path.join(self.dossier, nom)
+
+    @staticmethod
+    def _lire_jsonl(path):
+        if not os.path.exists(path):
+            return
+        with open(path, encoding="utf-8") as f:
+            for ligne in f:
+                try:
+                    yield json.loads(ligne)
+                except json.JSONDecodeError:
+                    return  # dernière ligne tronquée par l'interruption
+
+    def _charger(self):
+        if not os.path.exists(self._fichier("frontier.json")):
+            return
+        with open(self._fichier("frontier.json"), encoding="utf-8") as f:
+            etat = json.load(f)
+        if time.time() - etat["created_at"] > REPRISE_TTL:
+            print("🧹 Point de reprise trop ancien : nouveau crawl")
+            shutil.rmtree(self.dossier, ignore_errors=True)
+            return
+        self.created_at = etat["created_at"]
+        for entree in self._lire_jsonl(self._fichier("pages.jsonl")):
+            if "fin" in entree:
+                self._fixer_fin(entree["fin"])
+            else:
+                self._poser_page(entree["page"], entree["liens"])
+        for record in self._lire_jsonl(self._fichier("annonces.jsonl")):
+            self._reprises.add(record["link"])
+        self.telechargees |= self._reprises
+        print(f"♻️ Reprise du crawl : {len(self.pages)} page(s) et {len(self._reprises)} annonce(s) déjà faites")
+
+    def _ajouter_ligne(self, nom, entree):
+        if self.dossier is None:
+            return
+        if not os.path.exists(self._fichier("frontier.json")):
+            os.makedirs(self.dossier, exist_ok=True)
+            with open(self._fichier("frontier.json"), "w", encoding="utf-8") as f:
+                json.dump({"created_at": self.created_at}, f)
+        with open(self._fichier(nom), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entree, ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _empreinte(liens):
+        return hashlib.blake2b("\n".join(sorted(set(liens))).encode(), digest_size=16).digest()
+
+    def _poser_page(self, num, liens):
+        self.pages[num] = liens
+        self._empreintes[self._empreinte(liens)] = num
+
+    def _fixer_fin(self, fin):
+        self.derniere_page = fin if self.derniere_page is None else min(self.derniere_page, fin)
+        # Rare (une fois par crawl, ou presque) : on peut parcourir toutes les pages
+        for num in [n for n in self.pages if n > self.derniere_page]:
+            del self.pages[num]
+        self._empreintes = {e: n for e, n in self._empreintes.items() if n <= self.derniere_page}
+
+    def a_visiter(self, num):
+        if num in self.pages or (MAX_PAGES and num > MAX_PAGES):
+            return False
+        return self.derniere_page is None or num <= self.derniere_page
+
+    def ajouter_page(self, num, liens):
+        """Enregistre une page ; vide ou identique à une autre page, elle marque la fin des résultats."""
+        with self._lock:
+            # Au-delà de la dernière page, le site renvoie une page vide ou répète la dernière
+            meme_page = self._empreintes.get(self._empreinte(liens)) if liens else None
+            fin = None
+            if not liens:
+                fin = num - 1
+            else:
+                if meme_page is not None:
+                    fin = min(num, meme_page)
+                # Une page répétée plus tôt que celle déjà vue prend sa place (l'autre est retirée par la fin)
+                if meme_page is None or num < meme_page:
+                    self._poser_page(num, liens)
+                    self._ajouter_ligne("pages.jsonl", {"page": num, "liens": liens})
+            if fin is not None:
+                self._fixer_fin(fin)
+                self._ajouter_ligne("pages.jsonl", {"fin": fin})
+
+    def liens(self):
+        """Liens uniques, dans l'ordre des pages puis de la page."""
+        return list(dict.fromkeys(lien for num in sorted(self.pages) for lien in self.pages[num]))
+
+    def enregistrer(self, record):
+        with self._lock:
+            self.telechargees.add(record["link"])
+            self._ajouter_ligne("annonces.jsonl", record)
+
+    def reprises(self, liens):
+        """Annonces du crawl interrompu parmi `liens`, relues une à une dans annonces.jsonl."""
+        if not self._reprises:
+            return
+        voulus = self._reprises.intersection(liens)
+        for record in self._lire_jsonl(self._fichier("annonces.jsonl")):
+            if record["link"] in voulus:
+                voulus.discard(record["link"])
+                yield record
+
+    def terminer(self):
+        """Crawl mené à bien : le point de reprise ne sert plus."""
+        if self.dossier is not None:
+            shutil.rmtree(self.dossier, ignore_errors=True)
+
+
+def parse_search_page(content):
+    """Liens d'annonces d'une page de recherche (liste vide au-delà de la dernière page).
+
+    Une page sans liste de résultats (page d'erreur, anti-robot...) lève ValueError : elle ne doit
+    pas être prise pour la fin des résultats, qui marquerait les annonces suivantes comme retirées.
+    """
+    soup = BeautifulSoup(content, "html.parser")
+    wrapper = soup.find("div", class_="ep-search-list-wrapper")
+    if wrapper is None:
+        raise ValueError("Page de recherche sans liste de résultats (page d'erreur ou anti-robot ?)")
+    liens = []
+    for a in wrapper.find_all("a"):
         href = a.get("href")
         if not href:
             continue
 
         # ✅ On garde uniquement les liens valides
-        if "https://www.etreproprio.com/immobilier-" in href.lower():
+        if f"{ANNONCES_URL}/immobilier-".lower() in href.lower():
 
             # 🚫 On exclut les liens contenant "immeuble-de-rapport"
             if "immeuble-de-rapport" in href.lower():
@@ -32,107 +187,141 @@ for i in range(1, pages + 1):
                 continue
 
             liens.append(href)
+    return list(dict.fromkeys(liens))
 
-print(f"👉 {len(liens)} annonces collectées après filtrage")
 
-# Extraire détails pour chaque annonce
-data = []
-for link in liens:
-    page_ = requests.get(link)
-    soup_page = BeautifulSoup(page_.content, "html.parser")
+def fetch_search_page(num, cancel=None):
+    if cancel is not None and cancel.is_set():
+        raise InterruptedError("Scraping annulé")
+    url = f"{ANNONCES_URL}/annonces/tf.odd.g{num}#list"
+    page = polite_get(url, throttle=throttle, timeout=TIMEOUT)
+    page.raise_for_status()
+    with metrics.timed("annonces/recherche"):
+        liens = parse_search_page(page.content)
+    print(f"Scraping page {num}: {url} ({len(liens)} annonces)")
+    return liens
 
-    # Price
-    try:
-        prix = soup_page.find("div", class_="ep-price").text.strip().replace(" ", "")
-    except:
-        prix = None
 
-    #Surface
-    try:
-        m2 = soup_page.find("div", class_="ep-area").text.strip()
-    except:
-        m2 = None
+def collect_links(frontier=None, cancel=None):
+    """Liens des annonces de toutes les pages de recherche, visitées en parallèle jusqu'à la dernière.
 
-    #Chambre
-    try:
-        chambres = soup_page.find("div", class_="ep-room").text.strip()
-    except:
-        chambres = None
+    Les pages sont demandées par vagues de MAX_WORKERS ; la première page vide (ou qui répète
+    une page déjà vue) fixe la dernière page, et plus rien n'est demandé au-delà.
+    """
+    frontier = frontier if frontier is not None else CrawlFrontier()
+    prochaine = 1
+    with ThreadPoolExecutor(max_workers=max(1, MAX_WORKERS)) as executor:
+        en_vol = {}
 
-    #DPE
-    try:
-        dpe_div = soup_page.select_one("div.dpe-letter.selected")
-        DPE = dpe_div.get_text(strip=True) if dpe_div else None
-    except:
-        DPE = None
-        
-    #GES
-    try:
-        ges_div = soup_page.select_one("div.ges-letter.selected")
-        GES = ges_div.get_text(strip=True) if ges_div else None
-    except:
-        GES = None
+        def planifier():
+            nonlocal prochaine
+            while len(en_vol) < max(1, MAX_WORKERS):
+                while prochaine in frontier.pages:
+                    prochaine += 1
+                if not frontier.a_visiter(prochaine):
+                    return
+                en_vol[executor.submit(fetch_search_page, prochaine, cancel)] = prochaine
+                prochaine += 1
 
-    #Lieux
-    try:
-        lieu = soup_page.find("div", class_="ep-loc").text.strip()
-    except:
-        lieu = None
-    
-    # Chopper l'image
-    try:
-        ref = soup_page.find("img", class_="horizontal-img")
-        # Only get the first image
-        Image = ref['src'] if ref and 'src' in ref.attrs else None
-    except:
-        Image = None
+        planifier()
+        while en_vol:
+            termines, _ = wait(en_vol, return_when=FIRST_COMPLETED)
+            for future in termines:
+                frontier.ajouter_page(en_vol.pop(future), future.result())
+            planifier()
 
-    # Terrasse ou balcon
-    try:
-        ref = soup_page.find("div", class_="ep-desc ep-a ep-desc-truncated")
+    liens = frontier.liens()
+    print(f"👉 {len(liens)} annonces collectées après filtrage ({len(frontier.pages)} page(s) de résultats)")
+    return liens
+
+
+# Blocs utiles d'une page annonce : seuls ces sous-arbres sont construits par le parseur
+CLASSES_UTILES = {"ep-price", "ep-area", "ep-room", "ep-loc", "dpe-letter", "ges-letter",
+                  "horizontal-img", "ep-desc"}
+FILTRE_ANNONCE = SoupStrainer(
+    ["div", "img"], attrs={"class": lambda c: c is not None and not CLASSES_UTILES.isdisjoint(c.split())}
+)
+
+
+def _blocs_annonce(soup):
+    """Premier bloc de chaque sorte, repérés en un seul parcours de l'arbre filtré."""
+    blocs = {}
+    for tag in soup.find_all(["div", "img"]):
+        classes = tag.get("class") or []
+        if tag.name == "img":
+            if "horizontal-img" in classes:
+                blocs.setdefault("image", tag)
+            continue
+        for cls in ("ep-price", "ep-area", "ep-room", "ep-loc"):
+            if cls in classes:
+                blocs.setdefault(cls, tag)
+        if "selected" in classes:
+            if "dpe-letter" in classes:
+                blocs.setdefault("dpe", tag)
+            if "ges-letter" in classes:
+                blocs.setdefault("ges", tag)
+        # Même règle que find(class_="a b c") : l'attribut class complet doit correspondre
+        joined = " ".join(classes)
+        if joined == "ep-desc ep-a ep-desc-truncated":
+            blocs.setdefault("description", tag)
+        elif joined == "ep-desc ep-generated ep-a":
+            blocs.setdefault("reference", tag)
+    return blocs
+
+
+# Extraire détails pour chaque annonce
+def parse_annonce(link, content):
+    """Extrait les champs d'une page annonce déjà téléchargée."""
+    soup_page = BeautifulSoup(content, "lxml", parse_only=FILTRE_ANNONCE)
+    blocs = _blocs_annonce(soup_page)
+
+    def texte(cle):
+        bloc = blocs.get(cle)
+        return bloc.text.strip() if bloc is not None else None
+
+    prix = texte("ep-price")
+    if prix is not None:
+        prix = prix.replace(" ", "")
+    m2 = texte("ep-area")
+    chambres = texte("ep-room")
+    lieu = texte("ep-loc")
+
+    #DPE / GES
+    DPE = blocs["dpe"].get_text(strip=True) if "dpe" in blocs else None
+    GES = blocs["ges"].get_text(strip=True) if "ges" in blocs else None
+
+    # Chopper l'image (la première seulement)
+    ref = blocs.get("image")
+    Image = ref["src"] if ref is not None and "src" in ref.attrs else None
+
+    # Terrasse ou balcon, puis stationnement : même bloc description
+    Exterieur = None
+    Stationnement = None
+    ref = blocs.get("description")
+    if ref is not None:
         if ref.find(string=lambda text: "Terrasse" in text):
             Exterieur = "Terrasse"
-        # Or balcon
-        if not Exterieur:
-            if ref.find(string=lambda text: "Balcon" in text):
-                Exterieur = "Balcon"
-    except:
-        Exterieur = None
-
-    # Stationnement
-    Stationnement = None
-    try:
-        ref = soup_page.find("div", class_="ep-desc ep-a ep-desc-truncated")
-        if ref:
-            text = ref.get_text()
-            if "Stationnement" in text:
-                Stationnement = "Stationnement"
-            elif "Parking" in text:
-                Stationnement = "Parking"
-            elif "Garage" in text:
-                Stationnement = "Garage"
-    except:
-        Stationnement = None
-
-    # Référence
-    try:
-        ref = soup_page.find("div", class_="ep-desc ep-generated ep-a")
-        if ref:
-            br = ref.find("br")
-            if br and br.next_sibling:
-                text = br.next_sibling.strip()
-                if text.startswith("Référence:"):
-                    Référence = text
-                else:
-                    Référence = None
-            else:
-                Référence = None
-        else:
-            Référence = None
-    except:
-        Référence = None
-        
-    data.append({
+        elif ref.find(string=lambda text: "Balcon" in text):
+            Exterieur = "Balcon"
+        text = ref.get_text()
+        if "Stationnement" in text:
+            Stationnement = "Stationnement"
+        elif "Parking" in text:
+            Stationnement = "Parking"
+        elif "Garage" in text:
+            Stationnement = "Garage"
+
+    # Référence : texte qui suit le premier <br> du bloc généré
+    Référence = None
+    ref = blocs.get("reference")
+    if ref is not None:
+        br = ref.find("br")
+        if br and isinstance(br.next_sibling, NavigableString) and br.next_sibling:
+            text = br.next_sibling.strip()
+            if text.startswith("Référence:"):
+                Référence = text
+
+    return {
         "link": link,
         "price": prix,
         "surface": m2,
@@ -144,10 +333,170 @@ for link in liens:
         "exterieur": Exterieur,
         "stationnement": Stationnement,
         "image": Image
-    })
+    }
+
+
+throttle = HostThrottle(DELAI_PAR_HOTE)
+
+
+def fetch_annonce(link, cancel=None):
+    """Télécharge une annonce (en respectant le délai par hôte) puis la parse dès réception."""
+    if cancel is not None and cancel.is_set():
+        raise InterruptedError("Scraping annulé")
+    page_ = polite_get(link, throttle=throttle, timeout=TIMEOUT)
+    page_.raise_for_status()
+    with metrics.timed("annonces/parsing"):
+        return parse_annonce(link, page_.content)
+
+
+def _fetch_and_save(link, cancel, frontier):
+    try:
+        record = fetch_annonce(link, cancel)
+    except (requests.HTTPError, requests.Timeout) as e:
+        # Annonce sans détails (écartée par le cleaner) et non enregistrée : une reprise la redemande
+        print(f"⚠️ Annonce non téléchargée ({e}) : {link}")
+        return dict.fromkeys(COLONNES, None) | {"link": link}
+    if frontier is not None:
+        frontier.enregistrer(record)
+    return record
+
+
+def fetch_annonces(liens, cancel=None, frontier=None):
+    """Détails des annonces, dans l'ordre de `liens` quel que soit le mode (séquentiel ou parallèle).
+
+    Les annonces déjà présentes dans `frontier` (reprise) ne sont pas retéléchargées.
+    """
+    deja = {record["link"]: record for record in frontier.reprises(liens)} if frontier is not None else {}
+    data = [deja.get(link) for link in liens]
+    a_faire = [i for i, link in enumerate(liens) if link not in deja]
+    if MAX_WORKERS <= 1:
+        for i in a_faire:
+            data[i] = _fetch_and_save(liens[i], cancel, frontier)
+    else:
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            futures = {executor.submit(_fetch_and_save, liens[i], cancel, frontier): i for i in a_faire}
+            for future in as_completed(futures):
+                data[futures[future]] = future.result()
+    print(f"📄 {len(a_faire)} annonces téléchargées, {len(liens) - len(a_faire)} reprises "
+          f"({MAX_WORKERS} worker(s), {DELAI_PAR_HOTE}s par hôte)")
+    return data
+
+
+def iter_annonces(liens, cancel=None, frontier=None):
+    """Détails des annonces au fil de l'eau : celles d'un crawl interrompu d'abord, puis les autres
+    dans l'ordre de `liens`.
+
+    Les annonces reprises sont relues une à une depuis le disque et au plus 4 téléchargements
+    par worker sont en vol : la mémoire ne grandit pas avec le crawl.
+    """
+    deja = set()
+    if frontier is not None:
+        for record in frontier.reprises(liens):
+            deja.add(record["link"])
+            yield record
+    a_faire = (link for link in liens if link not in deja)
+    if MAX_WORKERS <= 1:
+        for link in a_faire:
+            yield _fetch_and_save(link, cancel, frontier)
+        return
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+        en_vol = deque()
+        for link in a_faire:
+            en_vol.append(executor.submit(_fetch_and_save, link, cancel, frontier))
+            if len(en_vol) >= 4 * MAX_WORKERS:
+                yield en_vol.popleft().result()
+        while en_vol:
+            yield en_vol.popleft().result()
+
+
+def raw_chunks(records, raw_file, size=STREAM_CHUNK):
+    """Regroupe les annonces en paquets, ajoutés au CSV brut à mesure qu'ils passent."""
+    pd.DataFrame(columns=COLONNES).to_csv(raw_file, index=False, encoding="utf-8-sig")
+    paquet = []
+    for record in records:
+        paquet.append(record)
+        if len(paquet) >= size:
+            df = pd.DataFrame(paquet, columns=COLONNES)
+            df.to_csv(raw_file, mode="a", header=False, index=False, encoding="utf-8")
+            paquet = []
+            yield df
+    if paquet:
+        df = pd.DataFrame(paquet, columns=COLONNES)
+        df.to_csv(raw_file, mode="a", header=False, index=False, encoding="utf-8")
+        yield df
+
+
+def lire_liens_vus(data_dir):
+    """Liens déjà téléchargés lors des passages précédents -> date du dernier téléchargement (s)."""
+    vus_file = os.path.join(data_dir, LIENS_VUS)
+    if not os.path.exists(vus_file):
+        return {}
+    vus = pd.read_csv(vus_file)
+    dates = vus["vu_le"].fillna(0) if "vu_le" in vus.columns else 0
+    return dict(zip(vus["link"], pd.Series(dates, index=vus.index).astype(float)))
+
+
+def liens_gardes(data_dir):
+    """Liens des annonces gardées par le cleaner (jeu nettoyé)."""
+    clean_file = os.path.join(data_dir, "cleaned_data.csv")
+    if not os.path.exists(clean_file):
+        return set()
+    return set(pd.read_csv(clean_file, usecols=["link"])["link"])
+
+
+def sauver_liens_vus(data_dir, vus, telechargees):
+    vus = dict(vus) | dict.fromkeys(telechargees, int(time.time()))
+    vus_file = os.path.join(data_dir, LIENS_VUS)
+    tmp = vus_file + ".tmp"
+    pd.DataFrame({"link": list(vus), "vu_le": list(vus.values())}).sort_values("link").to_csv(
+        tmp, index=False, encoding="utf-8-sig")
+    os.replace(tmp, vus_file)
+
+
+def main(data_dir="data", cancel=None):
+    os.makedirs(data_dir, exist_ok=True)
+    raw_file = os.path.join(data_dir, "raw_data.csv")
+    actifs_file = os.path.join(data_dir, "liens_actifs.csv")
+
+    frontier = CrawlFrontier(os.path.join(data_dir, REPRISE_DIR))
+    liens = collect_links(frontier, cancel)
+
+    # Liens présents sur le site lors de ce passage (le cleaner s'en sert pour repérer les annonces retirées)
+    liens_actifs = list(liens)
+
+    # --- Mode incrémental : on ignore les annonces déjà téléchargées, y compris celles écartées au nettoyage,
+    # sauf les annonces gardées dont le prix n'a pas été relu depuis PRIX_TTL ---
+    vus = lire_liens_vus(data_dir)
+    gardes = liens_gardes(data_dir)
+    for lien in gardes - vus.keys():
+        vus[lien] = 0  # jeux nettoyés antérieurs au fichier des liens vus
+    if INCREMENTAL and vus:
+        limite = time.time() - PRIX_TTL
+        a_verifier = {l for l in liens if l in gardes and vus[l] <= limite} if PRIX_TTL > 0 else set()
+        nouveaux = sum(l not in vus for l in liens)
+        liens = [l for l in liens if l not in vus or l in a_verifier]
+        print(f"🆕 {nouveaux} nouvelles annonces à télécharger, {len(a_verifier)} à revérifier (prix) "
+              f"({len(vus)} déjà vues)")
+
+    if STREAMING:
+        # Mode flux : chaque paquet d'annonces part au nettoyage sans attendre la fin du crawl
+        pd.DataFrame({"link": liens_actifs}).to_csv(actifs_file, index=False, encoding="utf-8-sig")
+        clean_stream(raw_chunks(iter_annonces(liens, cancel, frontier), raw_file), data_dir, cancel)
+        sauver_liens_vus(data_dir, vus, frontier.telechargees)
+        frontier.terminer()
+        return
+
+    data = fetch_annonces(liens, cancel, frontier)
+
+    # Sauvegarde CSV
+    df = pd.DataFrame(data, columns=COLONNES)
+    df.to_csv(raw_file, index=False, encoding="utf-8-sig")
+    pd.DataFrame({"link": liens_actifs}).to_csv(actifs_file, index=False, encoding="utf-8-sig")
+    # Seules les annonces bien téléchargées comptent comme vues : les échecs seront retentés
+    sauver_liens_vus(data_dir, vus, frontier.telechargees)
+    frontier.terminer()
+    print(f"✅ Scraping terminé : {raw_file} créé")
 
 
-# Sauvegarde CSV
-df = pd.DataFrame(data)
-df.to_csv("data/raw_data.csv", index=False, encoding="utf-8-sig")
-print("✅ Scraping terminé : data/raw_data.csv créé")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,18 @@
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import quote
-import time
-from functools import lru_cache
+import os
+from concurrent.futures import ThreadPoolExecutor
+import pandas as pd
+from cache import persistent_cache
+from http_utils import WorkerThrottle, polite_get
+from metrics import metrics
+
+VILLE_IDEALE_URL = os.environ.get("IMMO_VILLE_IDEALE_URL", "https://www.ville-ideale.fr")
+VI_WORKERS = int(os.environ.get("IMMO_VI_WORKERS", "4"))  # villes notées en parallèle
+SCORES_FILE = "villes_scores.parquet"
+
+# Politesse envers le site : 1 s entre deux requêtes d'un même worker
+throttle = WorkerThrottle(1.0)
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -24,41 +34,55 @@ def _empty_scores():
         "❤️ Qualité de vie": None,
     }
 
-@lru_cache(maxsize=None)
+@persistent_cache("ville_ideale", is_valid=lambda scores: any(v is not None for v in scores.values()))
 def get_ville_ideale_scores(ville):
     """Scrape les notes de Ville Idéale pour une ville donnée."""
-    base_url = "https://www.ville-ideale.fr"
+    base_url = VILLE_IDEALE_URL
     search_url = f"{base_url}/recherche.php?query={quote(ville)}"
 
     try:
-        r = requests.get(search_url, headers=HEADERS, timeout=10)
+        r = polite_get(search_url, throttle=throttle, headers=HEADERS, timeout=10)
         r.raise_for_status()
     except Exception as e:
         print(f"❌ Erreur de recherche pour {ville}: {e}")
         return _empty_scores()
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    link = soup.select_one("a[href*='_']")
-
-    if not link:
+    with metrics.timed("ville_ideale/parsing"):
+        href = parse_search(r.text)
+    if not href:
         print(f"⚠️ Ville non trouvée sur Ville Idéale : {ville}")
         return _empty_scores()
 
-    ville_url = base_url + "/" + link["href"].lstrip("/")
-    time.sleep(1)
+    ville_url = base_url + "/" + href.lstrip("/")
 
     try:
-        r = requests.get(ville_url, headers=HEADERS, timeout=10)
+        r = polite_get(ville_url, throttle=throttle, headers=HEADERS, timeout=10)
         r.raise_for_status()
     except Exception as e:
         print(f"❌ Erreur chargement page {ville}: {e}")
         return _empty_scores()
 
-    soup = BeautifulSoup(r.text, "html.parser")
-    table = soup.find("table", {"id": "tablonotes"})
-    if not table:
+    with metrics.timed("ville_ideale/parsing"):
+        scores = parse_scores(r.text)
+    if scores is None:
         print(f"⚠️ Pas de tableau trouvé pour {ville}")
         return _empty_scores()
+    return scores
+
+
+def parse_search(html):
+    """Lien de la première ville proposée par la page de recherche (None si aucune)."""
+    soup = BeautifulSoup(html, "html.parser")
+    link = soup.select_one("a[href*='_']")
+    return link["href"] if link else None
+
+
+def parse_scores(html):
+    """Notes du tableau `tablonotes` d'une page ville (None si le tableau est absent)."""
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table", {"id": "tablonotes"})
+    if not table:
+        return None
 
     mapping = {
         "Environnement": "🌿 Environnement",
@@ -91,9 +115,43 @@ def get_ville_ideale_scores(ville):
 
     return scores
 
-# === Exemple d’utilisation ===
+
+SCORE_COLUMNS = list(_empty_scores())
+
+
+def score_villes(villes, cancel=None):
+    """Table des notes (city + une colonne par critère) pour des villes distinctes, en parallèle."""
+    def score(ville):
+        if cancel is not None and cancel.is_set():
+            raise InterruptedError("Notation des villes annulée")
+        return {"city": ville, **get_ville_ideale_scores(ville)}
+
+    with ThreadPoolExecutor(max_workers=VI_WORKERS) as executor:
+        rows = list(executor.map(score, villes))
+    return pd.DataFrame(rows, columns=["city"] + SCORE_COLUMNS).astype({c: "float64" for c in SCORE_COLUMNS})
+
+
+def villes_distinctes(data_dir="data"):
+    """Villes des annonces en ligne, d'après la synthèse par ville du cleaner (ou le CSV nettoyé)."""
+    summary = os.path.join(data_dir, "villes_summary.parquet")
+    if os.path.exists(summary):
+        villes = pd.read_parquet(summary, columns=["city"])["city"]
+    else:
+        df = pd.read_csv(os.path.join(data_dir, "cleaned_data.csv"), usecols=lambda c: c in ("city", "removed"))
+        villes = df.loc[~df["removed"], "city"] if "removed" in df.columns else df["city"]
+    return sorted(villes.dropna().unique())
+
+
+def main(data_dir="data", cancel=None):
+    villes = villes_distinctes(data_dir)
+    scores = score_villes(villes, cancel)
+    path = os.path.join(data_dir, SCORES_FILE)
+    tmp = path + ".tmp"
+    scores.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+    notees = scores[SCORE_COLUMNS].notna().any(axis=1).sum()
+    print(f"✅ Notes Ville Idéale : {notees} / {len(villes)} villes notées ({VI_WORKERS} worker(s)), {path} créé")
+
+
 if __name__ == "__main__":
-    villes = ["Bordeaux", "Toulouse", "La Rochelle"]
-    for v in villes:
-        print(f"\n🏙️ {v}")
-        print(get_ville_ideale_scores(v))
+    main()
@@ -1,18 +1,37 @@
-import requests
-from bs4 import BeautifulSoup
+import os
 import re
-from functools import lru_cache
-from urllib.parse import quote
+from concurrent.futures import ThreadPoolExecutor
+from cache import cache, make_key
+from http_utils import HostThrottle, http_get, http_post
+from metrics import metrics
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; CityScraper/1.5; +https://example.com)"
 }
 
-@lru_cache(maxsize=None)
-def get_ville_infos(nom_ville):
-    """Récupère les infos principales d'une ville sur Wikipédia (français)."""
+# API de Wikipédia (résumés, lien Wikidata) et point SPARQL de Wikidata (population, superficie)
+WIKI_API_URL = os.environ.get("IMMO_WIKI_API_URL", "https://fr.wikipedia.org/w/api.php")
+WIKIDATA_SPARQL_URL = os.environ.get("IMMO_WIKIDATA_SPARQL_URL", "https://query.wikidata.org/sparql")
+TITRES_PAR_REQUETE = 20     # maximum de l'API pour les résumés d'introduction (exintro)
+ENTITES_PAR_REQUETE = 200   # éléments Wikidata par requête SPARQL
+
+KM2 = "http://www.wikidata.org/entity/Q712226"
+HECTARE = "http://www.wikidata.org/entity/Q35852"
+RANG_PREFERE = "http://wikiba.se/ontology#PreferredRank"
+
+# Petite pause entre deux requêtes pour ne pas surcharger Wikipédia (partagée entre threads)
+throttle = HostThrottle(0.1)
 
-    # 🧹 1. Nettoyage du nom : enlever arrondissement / chiffres / suffixes "e", "ème", etc.
+# Fiches déjà obtenues dans ce processus : évite de relire le cache disque à chaque appel
+_fiches = {}
+
+def _is_found(infos):
+    """Un échec réseau renvoie une fiche vide : on ne la garde pas en cache disque."""
+    return infos["population"] is not None or infos["infos"] != _empty_ville(None)["infos"]
+
+
+def normalize_ville(nom_ville):
+    """Titre d'article probable : sans arrondissement, chiffres ni suffixes "e", "ème", etc."""
     ville_clean = (
         str(nom_ville)
         .strip()
@@ -28,44 +47,148 @@ def get_ville_infos(nom_ville):
     )
 
     # Supprimer chiffres et suffixes type "e", "ᵉ", "eme" qui suivent un chiffre
-    ville_clean = re.sub(r"\d+\s*(?:er|eme|ème|e)?", "", ville_clean, flags=re.IGNORECASE).strip()
+    return re.sub(r"\d+\s*(?:er|eme|ème|e)?", "", ville_clean, flags=re.IGNORECASE).strip()
+
 
-    nom_enc = quote(ville_clean.replace(" ", "_"))
-    url = f"https://fr.wikipedia.org/wiki/{nom_enc}"
+def get_villes_infos(noms, workers=1):
+    """Infos Wikipédia de plusieurs villes en quelques requêtes groupées : {nom: fiche}.
 
+    Les noms sont normalisés en titres d'articles, interrogés par lots de TITRES_PAR_REQUETE
+    (résumé + identifiant Wikidata), puis les chiffres de tous les articles trouvés sont lus
+    en une requête SPARQL par lot de ENTITES_PAR_REQUETE. Les fiches trouvées vont au cache disque.
+    """
+    result, a_chercher = {}, []
+    noms = list(dict.fromkeys(noms))
+    sur_disque = cache.get_many("wikipedia", [make_key((nom,)) for nom in noms if nom not in _fiches])
+    for nom in noms:
+        if nom in _fiches:
+            result[nom] = _fiches[nom]
+            continue
+        key = make_key((nom,))
+        if key in sur_disque:
+            result[nom] = _fiches[nom] = sur_disque[key]
+        else:
+            a_chercher.append(nom)
+    if not a_chercher:
+        return result
+
+    titres = {nom: normalize_ville(nom) for nom in a_chercher}
+    uniques = sorted({t for t in titres.values() if t})
+    lots = [uniques[i:i + TITRES_PAR_REQUETE] for i in range(0, len(uniques), TITRES_PAR_REQUETE)]
+    pages = {}
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        for lot in executor.map(fetch_pages, lots):
+            pages.update(lot)
+
+    qids = sorted({p["qid"] for p in pages.values() if p["qid"]})
+    chiffres = {}
+    for i in range(0, len(qids), ENTITES_PAR_REQUETE):
+        chiffres.update(fetch_chiffres(qids[i:i + ENTITES_PAR_REQUETE]))
+
+    trouvees = []
+    for nom in a_chercher:
+        infos = build_infos(nom, pages.get(titres[nom]), chiffres)
+        # Une fiche vide (panne réseau) n'est gardée nulle part : l'appel suivant la redemande
+        if _is_found(infos):
+            trouvees.append((make_key((nom,)), infos))
+            _fiches[nom] = infos
+        result[nom] = infos
+    cache.set_many("wikipedia", trouvees)
+    return result
+
+
+def get_ville_infos(nom_ville):
+    """Récupère les infos principales d'une ville sur Wikipédia (français)."""
+    return get_villes_infos([nom_ville])[nom_ville]
+
+
+def fetch_pages(titres):
+    """Résumé d'introduction et identifiant Wikidata de plusieurs articles, en une requête."""
+    params = {
+        "action": "query", "format": "json", "formatversion": "2", "redirects": "1",
+        "prop": "extracts|pageprops", "exintro": "1", "explaintext": "1", "exlimit": "max",
+        "ppprop": "wikibase_item", "titles": "|".join(titres),
+    }
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
-        if response.status_code != 200:
-            print(f"⚠️ Page Wikipedia non trouvée pour {nom_ville} (tentative avec {ville_clean})")
-            return _empty_ville(nom_ville)
+        throttle.wait(WIKI_API_URL)
+        response = http_get(WIKI_API_URL, params=params, headers=HEADERS, timeout=20)
+        response.raise_for_status()
     except Exception as e:
-        print(f"❌ Erreur lors de la requête pour {nom_ville}: {e}")
-        return _empty_ville(nom_ville)
+        print(f"❌ Erreur lors de la requête Wikipédia ({len(titres)} villes) : {e}")
+        return {}
+    with metrics.timed("wikipedia/parsing"):
+        return parse_pages(titres, response.json())
+
+
+def parse_pages(titres, data):
+    """{titre demandé: {"extract", "qid"}} d'une réponse action=query (titres normalisés et redirections suivis)."""
+    query = data.get("query", {})
+    renvois = {n["from"]: n["to"] for n in query.get("normalized", [])}
+    redirections = {r["from"]: r["to"] for r in query.get("redirects", [])}
+    trouvees = {
+        p["title"]: {"extract": p.get("extract", ""), "qid": p.get("pageprops", {}).get("wikibase_item")}
+        for p in query.get("pages", []) if not p.get("missing") and not p.get("invalid")
+    }
+    pages = {}
+    for titre in titres:
+        cible = renvois.get(titre, titre)
+        cible = redirections.get(cible, cible)
+        if cible in trouvees:
+            pages[titre] = trouvees[cible]
+    return pages
 
-    soup = BeautifulSoup(response.text, "html.parser")
 
-    infobox = soup.find("table", {"class": "infobox"})
-    population = superficie = densite = None
+def fetch_chiffres(qids):
+    """Population et superficie (km²) de plusieurs éléments Wikidata, en une requête SPARQL."""
+    requete = (
+        "SELECT ?item ?population ?rang ?date ?superficie ?unite WHERE {\n"
+        f"  VALUES ?item {{ {' '.join('wd:' + q for q in qids)} }}\n"
+        "  { ?item p:P1082 ?st . ?st ps:P1082 ?population ; wikibase:rank ?rang .\n"
+        "    FILTER(?rang != wikibase:DeprecatedRank) OPTIONAL { ?st pq:P585 ?date } }\n"
+        "  UNION\n"
+        "  { ?item p:P2046/psv:P2046 ?v . ?v wikibase:quantityAmount ?superficie ; wikibase:quantityUnit ?unite }\n"
+        "}"
+    )
+    headers = dict(HEADERS, Accept="application/sparql-results+json")
+    try:
+        throttle.wait(WIKIDATA_SPARQL_URL)
+        response = http_post(WIKIDATA_SPARQL_URL, data={"query": requete}, headers=headers, timeout=30)
+        response.raise_for_status()
+    except Exception as e:
+        print(f"❌ Erreur lors de la requête Wikidata ({len(qids)} villes) : {e}")
+        return {}
+    with metrics.timed("wikipedia/parsing"):
+        return parse_chiffres(response.json())
 
-    if infobox:
-        text = infobox.get_text(" ", strip=True).lower()
-        text = text.replace("\xa0", " ").replace(",", ".").replace("  ", " ")
 
-        pop_match = re.search(r"population[^\d]*([\d\s]{4,})", text)
-        sup_match = re.search(r"superficie[^\d]*([\d\.]+)", text)
-        den_match = re.search(r"densité[^\d]*([\d\s\.]+)", text)
+def parse_chiffres(data):
+    """{qid: (population, superficie_km2)} : population au rang préféré, sinon la plus récente."""
+    populations, superficies = {}, {}
+    for row in data["results"]["bindings"]:
+        qid = row["item"]["value"].rsplit("/", 1)[-1]
+        if "population" in row:
+            rang = (row["rang"]["value"] == RANG_PREFERE, row.get("date", {}).get("value", ""))
+            if qid not in populations or rang > populations[qid][0]:
+                populations[qid] = (rang, int(float(row["population"]["value"])))
+        elif row["unite"]["value"] in (KM2, HECTARE) and qid not in superficies:
+            km2 = float(row["superficie"]["value"])
+            superficies[qid] = km2 / 100 if row["unite"]["value"] == HECTARE else km2
+    return {
+        qid: (populations[qid][1] if qid in populations else None, superficies.get(qid))
+        for qid in set(populations) | set(superficies)
+    }
+
 
-        if pop_match:
-            population = f"{_clean_number(pop_match.group(1))} hab."
-        if sup_match:
-            superficie = f"{_clean_number(sup_match.group(1))} km²"
-        if den_match:
-            densite = f"{_clean_number(den_match.group(1))} hab/km²"
+def build_infos(nom_ville, page, chiffres):
+    """Fiche d'une ville à partir de son article (None si introuvable) et des chiffres Wikidata."""
+    if page is None:
+        return _empty_ville(nom_ville)
+    population, superficie = chiffres.get(page["qid"], (None, None))
 
-    # 🔹 Court résumé (nettoyé + suppression prononciation)
+    # 🔹 Court résumé : premier paragraphe consistant de l'introduction
     resume = ""
-    for p in soup.select("p"):
-        txt = p.get_text(" ", strip=True)
+    for paragraphe in page["extract"].split("\n"):
+        txt = paragraphe.strip()
         if len(txt) > 100 and not txt.startswith("Cet article"):
             resume = _clean_resume(txt)
             break
@@ -75,9 +198,9 @@ def get_ville_infos(nom_ville):
 
     return {
         "ville": nom_ville,
-        "population": population,
-        "superficie": superficie,
-        "densité": densite,
+        "population": f"{population} hab." if population is not None else None,
+        "superficie": f"{_clean_number(f'{superficie:g}')} km²" if superficie else None,
+        "densité": f"{round(population / superficie)} hab/km²" if population is not None and superficie else None,
         "infos": resume,
     }
 
@@ -136,7 +259,5 @@ def _empty_ville(nom_ville):
 
 
 if __name__ == "__main__":
-    print(get_ville_infos("Paris 15e arrondissement"))
-    print(get_ville_infos("Marseille 3e"))
-    print(get_ville_infos("Montpellier"))
-    print(get_ville_infos("Lyon 7eme"))
\ No newline at end of file
+    for infos in get_villes_infos(["Paris 15e arrondissement", "Marseille 3e", "Montpellier", "Lyon 7eme"]).values():
+        print(infos)
\ No newline at end of file
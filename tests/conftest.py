@@ -0,0 +1,26 @@
+"""Tests hors ligne : les services externes sont remplacés par les serveurs locaux de benchmarks/.
+
+Lancement (depuis la racine du projet) : python -m pytest -q
+"""
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+
+# Avant tout import des scripts : le cache disque par défaut ne doit pas être celui du projet
+os.environ["IMMO_CACHE_FILE"] = os.path.join(tempfile.mkdtemp(prefix="immo_tests_"), "cache.sqlite")
+
+import pytest  # noqa: E402
+
+import cache as cache_module  # noqa: E402
+
+
+@pytest.fixture
+def disk_cache(tmp_path, monkeypatch):
+    """Cache disque vide, propre au test, à la place du cache partagé des scripts."""
+    fresh = cache_module.PersistentCache(str(tmp_path / "cache.sqlite"))
+    monkeypatch.setattr(cache_module, "cache", fresh)
+    return fresh
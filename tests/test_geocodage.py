@@ -0,0 +1,62 @@
+"""Géocodage par lots CSV (cleaner.geocode_batch / geocode_unique_pairs) contre benchmarks/geocoder_stub.py."""
+import pandas as pd
+import pytest
+
+import cleaner
+from geocoder_stub import INCONNUE, GeocoderStub, coordinates
+
+
+@pytest.fixture
+def geocodeur(monkeypatch, disk_cache):
+    stub = GeocoderStub().start()
+    monkeypatch.setattr(cleaner, "GEOCODER_URL", stub.url)
+    monkeypatch.setattr(cleaner, "cache", disk_cache)
+    yield stub
+    stub.stop()
+
+
+def couples(n, prefix="Ville"):
+    return pd.DataFrame({
+        "postal_code": [f"{(i % 95) + 1:02d}{i:03d}" for i in range(n)],
+        "city": [INCONNUE if i % 10 == 9 else f"{prefix}-{i}" for i in range(n)],
+    })
+
+
+def assert_coordonnees(result):
+    """Chaque ligne porte les coordonnées de son propre couple (aucun décalage)."""
+    for p, c, lat, lon in result[["postal_code", "city", "latitude", "longitude"]].itertuples(index=False):
+        attendu = coordinates(p, c)
+        if attendu is None:
+            assert pd.isna(lat) and pd.isna(lon), (p, c)
+        else:
+            assert (lat, lon) == attendu, (p, c)
+
+
+def test_lots_complets(geocodeur, monkeypatch):
+    monkeypatch.setattr(cleaner, "GEOCODAGE_CHUNK", 10)
+    result = cleaner.geocode_batch(couples(25))
+    assert len(result) == 25
+    assert_coordonnees(result)
+    assert geocodeur.requests == {"/search/csv/": 3, "/search/": 0}
+
+
+def test_lot_tronque_repli_ligne_a_ligne(geocodeur, monkeypatch):
+    monkeypatch.setattr(cleaner, "GEOCODAGE_CHUNK", 10)
+    geocodeur.perdues = 1
+    result = cleaner.geocode_batch(couples(25))
+    assert len(result) == 25
+    assert_coordonnees(result)
+    # Les trois lots reviennent incomplets : toutes leurs lignes sont géocodées une à une
+    assert geocodeur.requests == {"/search/csv/": 3, "/search/": 25}
+
+
+def test_cache_disque(geocodeur):
+    df = pd.concat([couples(30), couples(30)], ignore_index=True)  # doublons : un envoi par couple distinct
+    assert_coordonnees(cleaner.geocode_unique_pairs(df))
+    assert geocodeur.requests["/search/csv/"] == 1
+
+    # Second passage : tout vient du cache, sauf les villes introuvables (jamais gardées)
+    coords = cleaner.geocode_unique_pairs(df)
+    assert_coordonnees(coords)
+    assert len(coords) == 30
+    assert geocodeur.requests["/search/csv/"] == 2
@@ -0,0 +1,65 @@
+"""Fiches Wikipédia par lots (scraper_wiki.get_villes_infos) contre benchmarks/wiki_stub.py."""
+import json
+import math
+import os
+
+import pytest
+
+import scraper_wiki
+from wiki_stub import WikiStub
+
+EXPECTED = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "benchmarks", "fixtures",
+                        "wikipedia", "expected.json")
+
+
+@pytest.fixture
+def wiki(monkeypatch, disk_cache):
+    stub = WikiStub().start()
+    monkeypatch.setattr(scraper_wiki, "WIKI_API_URL", f"{stub.url}/w/api.php")
+    monkeypatch.setattr(scraper_wiki, "WIKIDATA_SPARQL_URL", f"{stub.url}/sparql")
+    monkeypatch.setattr(scraper_wiki, "cache", disk_cache)
+    monkeypatch.setattr(scraper_wiki, "_fiches", {})
+    yield stub
+    stub.stop()
+
+
+@pytest.fixture
+def expected():
+    with open(EXPECTED, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_fiches_attendues(wiki, expected):
+    villes = [e["ville"] for e in expected]
+    got = scraper_wiki.get_villes_infos(villes)
+    for e in expected:
+        assert got[e["ville"]] == e["infos"], e["ville"]
+    # Une requête action=query par lot de titres, une requête SPARQL pour tous les éléments
+    titres = {scraper_wiki.normalize_ville(v) for v in villes} - {None, ""}
+    assert wiki.requests["/w/api.php"] == math.ceil(len(titres) / scraper_wiki.TITRES_PAR_REQUETE)
+    assert wiki.requests["/sparql"] == 1
+
+
+def test_second_appel_depuis_le_cache(wiki, expected):
+    villes = [e["ville"] for e in expected]
+    scraper_wiki.get_villes_infos(villes)
+    avant = dict(wiki.requests)
+    assert scraper_wiki.get_villes_infos(villes) == {e["ville"]: e["infos"] for e in expected}
+    # Seule la ville sans article est redemandée (fiche vide jamais gardée), sans requête SPARQL
+    assert wiki.requests == {"/w/api.php": avant["/w/api.php"] + 1, "/sparql": avant["/sparql"]}
+
+    scraper_wiki._fiches.clear()  # nouveau processus : les fiches trouvées viennent du cache disque
+    avant = dict(wiki.requests)
+    scraper_wiki.get_villes_infos([v for v in villes if v != "Introuvable"])
+    assert wiki.requests == avant
+
+
+def test_panne_non_memorisee(wiki, expected, monkeypatch):
+    ville = next(e for e in expected if e["infos"]["population"] is not None)
+    # API indisponible le temps d'un appel : fiche vide, gardée ni en mémoire ni sur disque
+    monkeypatch.setattr(scraper_wiki, "WIKI_API_URL", f"{wiki.url}/indisponible")
+    assert scraper_wiki.get_villes_infos([ville["ville"]])[ville["ville"]]["population"] is None
+
+    monkeypatch.setattr(scraper_wiki, "WIKI_API_URL", f"{wiki.url}/w/api.php")
+    assert scraper_wiki.get_villes_infos([ville["ville"]])[ville["ville"]] == ville["infos"]
+    assert wiki.requests["/w/api.php"] == 1